@@ -0,0 +1,208 @@
+"""Benchmark the app's hot paths on synthetic sessions.
+
+    python benchmarks/bench_paths.py                          # 4x4x15 and 96x4x15
+    python benchmarks/bench_paths.py --sizes 4x4x15,24x4x15 --repeat 10
+    python benchmarks/bench_paths.py --out results.json       # also write JSON
+
+A size is periods x directions x minutes-per-period. Each path runs the same
+code the app runs, minus the dialogs and widgets:
+
+    calculate_results        delay_engine.calculate + write_results_workbook
+    save_data                delay_io.write_raw_workbook
+    populate_form2_data      delay_engine.form2_rows
+    calculate_form2_results  delay.form2_results_text
+    export_form2             delay_io.write_form2_workbook
+
+Wall time is the min and median of --repeat timed runs (after one warm-up
+run); peak memory and retained blocks (memory blocks still allocated after
+the call returns, e.g. caches) come from one extra run under tracemalloc, so
+they do not slow down the timed runs.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+
+import delay
+import delay_engine
+import delay_io
+from delay_store import DIRECTIONS, ObservationStore
+
+DEFAULT_SIZES = "4x4x15,96x4x15"
+
+FORM2_INFO = [
+    ["Date:", "2025-10-27"],
+    ["Location:", "101 & Hollybrook"],
+    ["Approach:", "All"],
+    ["Movement(s):", "All"],
+    ["Lanes:", "1"],
+    ["Weather:", "Cloudy"],
+    ["Peak Hour:", "07:30 - 08:30"],
+    ["Delay Observer:", ""],
+    ["Count Observer:", ""],
+    ["Recorder:", ""],
+]
+
+
+def parse_size(text):
+    """"96x4x15" -> (96, 4, 15)."""
+    periods, directions, minutes = (int(part) for part in text.lower().split("x"))
+    if not 1 <= directions <= len(DIRECTIONS):
+        raise argparse.ArgumentTypeError(f"directions must be 1-{len(DIRECTIONS)}: {text}")
+    return periods, directions, minutes
+
+
+def synthetic_session(periods, directions, minutes, seed=0):
+    """An ObservationStore and unique_minute_map with one row per minute.
+
+    Rows are appended period by period, direction by direction, the order an
+    observer produces them in; counts are small random integers.
+    """
+    rng = random.Random(seed)
+    store = ObservationStore()
+    unique_minute_map = {}
+    for period in range(1, periods + 1):
+        for direction in DIRECTIONS[:directions]:
+            for minute in range(1, minutes + 1):
+                stopped = [rng.randint(0, 4) for _ in range(4)]
+                notstopped = [rng.randint(0, 6) for _ in range(4)]
+                u_st = rng.randint(0, max(stopped))
+                u_ns = rng.randint(0, 8)
+                store.append(period, minute, direction, stopped, u_st, notstopped, u_ns)
+                unique_minute_map[(period, direction, minute)] = {"stopped": u_st, "notstopped": u_ns}
+    return store, unique_minute_map
+
+
+def make_paths(store, unique_minute_map, periods, out_dir):
+    """{path name: zero-argument callable} for one synthetic session."""
+    results = delay_engine.calculate(store, unique_minute_map, periods)
+    form2 = delay_engine.form2_rows(results.arrays)
+    info = {"date": "2025-10-27", "intersection": "101 & Hollybrook", "weather": "Cloudy",
+            "start_time": "07:30:00"}
+
+    def calculate_results():
+        r = delay_engine.calculate(store, unique_minute_map, periods)
+        delay_io.write_results_workbook(os.path.join(out_dir, "results.xlsx"), r,
+                                        "2025-10-27", "101 & Hollybrook", "Cloudy")
+
+    def save_data():
+        delay_io.write_raw_workbook(os.path.join(out_dir, "data.xlsx"), store, unique_minute_map, info)
+
+    def populate_form2_data():
+        delay_engine.form2_rows(results.arrays)
+
+    def calculate_form2_results():
+        delay.form2_results_text(results)
+
+    def export_form2():
+        delay_io.write_form2_workbook(os.path.join(out_dir, "form2.xlsx"), form2, FORM2_INFO)
+
+    return {
+        "calculate_results": calculate_results,
+        "save_data": save_data,
+        "populate_form2_data": populate_form2_data,
+        "calculate_form2_results": calculate_form2_results,
+        "export_form2": export_form2,
+    }
+
+
+def measure(func, repeat):
+    """Wall times of repeat runs plus tracemalloc peak and retained blocks of one run."""
+    func()  # warm-up: lazy imports, openpyxl styles, NumPy dispatch caches
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    func()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Blocks alive after the call that were not before it; freed temporaries are not counted
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    return {
+        "min_ms": min(times) * 1000,
+        "median_ms": statistics.median(times) * 1000,
+        "peak_kib": peak / 1024,
+        "retained_blocks": retained,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated PERIODSxDIRECTIONSxMINUTES (default {DEFAULT_SIZES})")
+    parser.add_argument("--paths", help="comma-separated subset of paths to run")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per path (default 5)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic counts")
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s]
+    selected = args.paths.split(",") if args.paths else None
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "runs": [],
+    }
+
+    print(f"{'size':<10} {'rows':>6} {'path':<24} {'min ms':>9} {'median ms':>10} "
+          f"{'peak KiB':>9} {'retained':>8}")
+    with tempfile.TemporaryDirectory() as out_dir:
+        for periods, directions, minutes in sizes:
+            store, unique_minute_map = synthetic_session(periods, directions, minutes, args.seed)
+            paths = make_paths(store, unique_minute_map, periods, out_dir)
+            unknown = set(selected or ()) - set(paths)
+            if unknown:
+                parser.error(f"unknown path(s): {', '.join(sorted(unknown))}")
+            size = f"{periods}x{directions}x{minutes}"
+            for name, func in paths.items():
+                if selected and name not in selected:
+                    continue
+                stats = measure(func, args.repeat)
+                report["runs"].append({"path": name, "periods": periods, "directions": directions,
+                                       "minutes": minutes, "rows": len(store), **stats})
+                print(f"{size:<10} {len(store):>6} {name:<24} {stats['min_ms']:>9.2f} "
+                      f"{stats['median_ms']:>10.2f} {stats['peak_kib']:>9.1f} {stats['retained_blocks']:>8}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
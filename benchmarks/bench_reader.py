@@ -0,0 +1,69 @@
+"""Compare the streaming raw-data reader with pandas.read_excel.
+
+    python benchmarks/bench_reader.py                 # Oct 27/ and SEPTEMBER_22/
+    python benchmarks/bench_reader.py "Oct 30" --repeat 20
+
+Both sides produce the app structures (ObservationStore, unique_minute_map,
+metadata); the pandas side reads the sheet with pd.read_excel first, as the
+loader did before it streamed with openpyxl.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd
+
+import delay_io
+
+
+def load_with_pandas(filename):
+    df = pd.read_excel(filename, sheet_name=0, header=None)
+    return delay_io.parse_raw_rows(df.itertuples(index=False, name=None))
+
+
+def best_time(func, path, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dirs", nargs="*", default=[str(ROOT / "Oct 27"), str(ROOT / "SEPTEMBER_22")])
+    parser.add_argument("--repeat", type=int, default=10, help="runs per file; the best is reported")
+    args = parser.parse_args(argv)
+
+    paths = sorted(p for d in args.dirs for p in Path(d).glob("*_DATA.xlsx"))
+    if not paths:
+        print("No *_DATA.xlsx workbooks found.", file=sys.stderr)
+        return 1
+
+    print(f"{'workbook':<40} {'rows':>5} {'read_excel ms':>14} {'streaming ms':>13} {'speedup':>8}")
+    total_pandas = total_stream = 0.0
+    for path in paths:
+        data, _, _ = delay_io.load_raw_workbook(path)
+        if list(data) != list(load_with_pandas(path)[0]):
+            print(f"{path}: readers disagree", file=sys.stderr)
+            return 1
+        t_pandas = best_time(load_with_pandas, path, args.repeat)
+        t_stream = best_time(delay_io.load_raw_workbook, path, args.repeat)
+        total_pandas += t_pandas
+        total_stream += t_stream
+        name = os.path.relpath(path, ROOT)
+        print(f"{name:<40} {len(data):>5} {t_pandas * 1000:>14.2f} {t_stream * 1000:>13.2f} "
+              f"{t_pandas / t_stream:>7.2f}x")
+    print(f"{'total':<40} {'':>5} {total_pandas * 1000:>14.2f} {total_stream * 1000:>13.2f} "
+          f"{total_pandas / total_stream:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,113 @@
+import time
+_IMPORT_START = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
-import pandas as pd
-import csv
+import contextlib
+import os
+import sys
+import threading
+
+# openpyxl and NumPy (delay_engine, delay_io) are imported where they
+# are used and preloaded in the background once the window is up, so the
+# first paint does not wait for them; delay_sync (asyncio) is imported only
+# when DELAY_SERVER is set
+import delay_clock
+import delay_journal
+import delay_keys
+import delay_profile
+from delay_store import ObservationStore, UniqueAggregates
+from delay_table import VirtualTable
+
+_IMPORT_END = time.perf_counter()
+
+# Heavy modules warmed up in the background after the first paint
+PRELOAD_MODULES = ["delay_engine", "delay_io"]
+
+# Study length in 15-minute periods: 4 is the classic one-hour study, 96 a full
+# day; longer values cover multi-day continuous counts
+DEFAULT_PERIODS = 4
+MAX_PERIODS = 96 * 7
+
+
+def period_label(period):
+    """Period combobox entry, e.g. "2 (15-30 min)", or "97 (24:00-24:15 h)" after the first hour."""
+    if period <= 4:
+        return f"{period} ({15*(period-1)}-{15*period} min)"
+    start, end = 15 * (period - 1), 15 * period
+    return f"{period} ({start // 60}:{start % 60:02d}-{end // 60}:{end % 60:02d} h)"
+
+
+# Tk callbacks timed when DELAY_PROFILE is set (see delay_profile)
+PROFILED_CALLBACKS = [
+    "increment_count", "increment_unique_minute", "add_entry", "next_minute",
+    "on_period_or_direction_change", "on_clock_tick",
+]
+
+# Callbacks that wait on dialogs; only their compute and write sections are timed
+PROFILED_SECTIONS = ["calculate_results", "write_results", "save_data"]
+
+
+def preload_modules(report=False):
+    """Import PRELOAD_MODULES on a daemon thread (set DELAY_PRELOAD=0 to skip)."""
+    def work():
+        start = time.perf_counter()
+        for name in PRELOAD_MODULES:
+            __import__(name)
+        if report:
+            print(f"  background preload        {(time.perf_counter() - start) * 1000:8.1f} ms "
+                  f"({', '.join(PRELOAD_MODULES)})", file=sys.stderr)
+
+    threading.Thread(target=work, name="preload", daemon=True).start()
+
+
+def print_startup_timing(stages):
+    """Print (label, seconds) stages of the startup to stderr."""
+    print("Startup timing:", file=sys.stderr)
+    for label, seconds in stages:
+        print(f"  {label:<25} {seconds * 1000:8.1f} ms", file=sys.stderr)
 
 class DelayStudyApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Intersection Delay Study Data Collector")
         self.root.geometry("1200x800")
-        self.data = []
+        # Opened on the first save when DELAY_REPOSITORY is set
+        self.repository = None
+        self.profile_path = delay_profile.profile_path()
+        self.profiler = None
+        if self.profile_path is not None:
+            # Wrap the hot callbacks before any widget captures them as commands
+            self.profiler = delay_profile.CallbackProfiler()
+            self.profiler.instrument(self, PROFILED_CALLBACKS)
+            self.profiler.register(PROFILED_SECTIONS)
+            self.root.bind("<F12>", lambda e: self.profiler.show_panel(self.root))
+        # Minute rows, one typed column per field
+        self.data = ObservationStore()
+        # Per-minute unique splits with incrementally maintained totals;
+        # DELAY_CHECK_AGGREGATES=1 verifies them against a full rebuild on every change
+        self.unique_store = UniqueAggregates(check=os.environ.get("DELAY_CHECK_AGGREGATES") == "1")
         # Stores observed approach volume per (period, direction)
-        self.approach_volume = {}
+        self.approach_volume = self.unique_store.approach_volume
         # Aggregated unique counts per (period, direction)
-        self.unique_map = {}
+        self.unique_map = self.unique_store.unique_map
         # Temporary per-minute unique results from Unique Assist
         self.current_unique_stopped = None
         self.current_unique_notstopped = None
-        # Inline unique per-minute counter storage: {(period, direction, minute): {"stopped": int, "notstopped": int}}
-        self.unique_minute_map = {}
+        # (period, direction, minute) the inline unique counters were last loaded for
+        self.unique_context = None
+        # Inline unique per-minute counters: a dense UniqueMinuteArray read like
+        # {(period, direction, minute): {"stopped": int, "notstopped": int}}
+        self.unique_minute_map = self.unique_store.minute_map
+        # Results of the last computed (session version, study length), shared by every view
+        self.results_key = None
+        self.results = None
+        self.results_intervals = None
+        self.validation_key = None
+        self.validation = None
+        # session_version() when the session last matched a file (Save Data / Open Data)
+        self.saved_version = None
 
         # --- Title ---
         title_label = ttk.Label(root, text="Traffic Delay Study Data Collection",
@@ -65,6 +154,15 @@ class DelayStudyApp:
         start_second_entry = ttk.Entry(info_frame, textvariable=self.start_second_var, width=3)
         start_second_entry.grid(row=1, column=7, padx=2, pady=5, sticky="w")
 
+        # Study length; the period choices are generated from it
+        self.num_periods_var = tk.StringVar(value=str(DEFAULT_PERIODS))
+        ttk.Label(info_frame, text="Study Length:").grid(row=2, column=0, padx=5, pady=5, sticky="e")
+        ttk.Spinbox(info_frame, textvariable=self.num_periods_var, from_=1, to=MAX_PERIODS,
+                    width=5).grid(row=2, column=1, padx=5, pady=5, sticky="w")
+        self.study_length_var = tk.StringVar()
+        ttk.Label(info_frame, textvariable=self.study_length_var).grid(row=2, column=2, columnspan=2,
+                                                                      padx=5, pady=5, sticky="w")
+
         # --- Input Frame ---
         input_frame = ttk.LabelFrame(root, text="Vehicle Count Data Entry")
         input_frame.pack(fill="x", padx=10, pady=5)
@@ -78,7 +176,6 @@ class DelayStudyApp:
         period_label.pack(side="left", padx=5)
         self.period_var = tk.StringVar(value="1")
         self.period_combo = ttk.Combobox(time_dir_frame, textvariable=self.period_var,
-                                        values=["1 (0-15 min)", "2 (15-30 min)", "3 (30-45 min)", "4 (45-60 min)"], 
                                         width=15, state="readonly")
         self.period_combo.pack(side="left", padx=5)
 
@@ -101,6 +198,14 @@ class DelayStudyApp:
         self.progress_button = ttk.Button(time_dir_frame, text="Next Minute", command=self.next_minute)
         self.progress_button.pack(side="left", padx=5)
 
+        # Sampling clock: highlights the interval being counted and adds the entry every minute
+        self.clock = delay_clock.SamplingClock(self.root, self.on_clock_tick)
+        self.clock_button = ttk.Button(time_dir_frame, text="Start Clock", command=self.toggle_clock)
+        self.clock_button.pack(side="left", padx=5)
+        self.clock_status_var = tk.StringVar()
+        ttk.Label(time_dir_frame, textvariable=self.clock_status_var).pack(side="left", padx=5)
+        ttk.Style().configure("ActiveInterval.TLabel", background="#ffd54f", font=("Helvetica", 10, "bold"))
+
         # Keep the tally matched with selected period/direction
         self.period_combo.bind("<<ComboboxSelected>>", self.on_period_or_direction_change)
         self.direction_combo.bind("<<ComboboxSelected>>", self.on_period_or_direction_change)
@@ -111,13 +216,17 @@ class DelayStudyApp:
 
         # Initialize variables for interval counts
         self.interval_vars = []
+        # Interval heading labels per column, stopped and not stopped, for the clock highlight
+        self.interval_headings = [[] for _ in range(delay_clock.INTERVALS_PER_MINUTE)]
         interval_labels = ["0-15 sec", "15-30 sec", "30-45 sec", "45-60 sec"]
         
         for i, label in enumerate(interval_labels):
             interval_frame = ttk.Frame(stopped_frame)
             interval_frame.pack(side="left", expand=True, padx=5, pady=5)
             
-            ttk.Label(interval_frame, text=label).pack()
+            heading = ttk.Label(interval_frame, text=label)
+            heading.pack()
+            self.interval_headings[i].append(heading)
             count_var = tk.StringVar(value="0")
             self.interval_vars.append(count_var)
             
@@ -143,7 +252,9 @@ class DelayStudyApp:
             interval_frame = ttk.Frame(notstopped_frame)
             interval_frame.pack(side="left", expand=True, padx=5, pady=5)
             
-            ttk.Label(interval_frame, text=label).pack()
+            heading = ttk.Label(interval_frame, text=label)
+            heading.pack()
+            self.interval_headings[i].append(heading)
             count_var = tk.StringVar(value="0")
             self.notstopped_vars.append(count_var)
             
@@ -173,6 +284,9 @@ class DelayStudyApp:
         ttk.Button(unique_inline, text="+", width=3, command=lambda: self.increment_unique_minute(False)).pack(side="left", padx=2)
 
         ttk.Button(unique_inline, text="Reset Unique", command=self.reset_unique_minute).pack(side="left", padx=10)
+        ttk.Button(unique_inline, text="Unique Assist", command=self.open_unique_assist).pack(side="left", padx=2)
+        ttk.Button(unique_inline, text="Batch Unique Assist...",
+                   command=self.batch_unique_assist).pack(side="left", padx=2)
 
         # Approach volume tally frame (15-minute)
         volume_frame = ttk.LabelFrame(input_frame, text="Approach Volume Tally (15-minute)")
@@ -194,25 +308,51 @@ class DelayStudyApp:
         ttk.Button(btn_frame, text="Add Entry", command=self.add_entry).pack(side="left", padx=5)
         ttk.Button(btn_frame, text="Reset Counts", command=self.reset_counts).pack(side="left", padx=5)
 
+        # Keyboard counting: hotkeys update integer counters, the display catches up once per frame
+        try:
+            hotkeys = delay_keys.load_hotkeys()
+        except ValueError as e:
+            messagebox.showwarning("Hotkeys", f"{str(e)}\nUsing the default hotkeys.")
+            hotkeys = dict(delay_keys.DEFAULT_HOTKEYS)
+        self.keyboard = delay_keys.KeyboardCounter(
+            self.root, hotkeys,
+            dict(zip(delay_keys.COUNTERS, self.interval_vars + self.notstopped_vars
+                     + [self.unique_minute_stopped_var, self.unique_minute_notstopped_var])),
+            on_unique=self.persist_unique_minute,
+            actions={"add_entry": self.add_entry})
+        self.keyboard_mode_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btn_frame, text="Keyboard counting", variable=self.keyboard_mode_var,
+                        command=self.toggle_keyboard_mode).pack(side="left", padx=15)
+        self.hotkey_help_var = tk.StringVar()
+        ttk.Label(btn_frame, textvariable=self.hotkey_help_var).pack(side="left", padx=5)
+        self.hotkey_summary = delay_keys.hotkey_summary(hotkeys)
+
         # --- Data Table ---
         table_frame = ttk.LabelFrame(root, text="Collected Data")
         table_frame.pack(fill="both", expand=True, padx=10, pady=5)
 
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(table_frame)
-        scrollbar.pack(side="right", fill="y")
+        # Filter the table by period and direction without copying rows
+        filter_frame = ttk.Frame(table_frame)
+        filter_frame.pack(fill="x", padx=5, pady=2)
+        ttk.Label(filter_frame, text="Show Period:").pack(side="left", padx=5)
+        self.filter_period_var = tk.StringVar(value="All")
+        self.filter_period_combo = ttk.Combobox(filter_frame, textvariable=self.filter_period_var,
+                                                width=6, state="readonly")
+        self.filter_period_combo.pack(side="left", padx=5)
+        ttk.Label(filter_frame, text="Direction:").pack(side="left", padx=5)
+        self.filter_direction_var = tk.StringVar(value="All")
+        filter_direction_combo = ttk.Combobox(filter_frame, textvariable=self.filter_direction_var,
+                                              values=["All", "North", "South", "East", "West"], width=10,
+                                              state="readonly")
+        filter_direction_combo.pack(side="left", padx=5)
+        self.filter_period_combo.bind("<<ComboboxSelected>>", self.on_table_filter_change)
+        filter_direction_combo.bind("<<ComboboxSelected>>", self.on_table_filter_change)
+        self.update_period_choices()
+        self.num_periods_var.trace_add("write", self.update_period_choices)
+
+        rows_frame = ttk.Frame(table_frame)
+        rows_frame.pack(fill="both", expand=True)
 
-        # Configure treeview
-        self.tree = ttk.Treeview(table_frame, 
-            columns=(
-                "period", "minute", "direction", 
-                "stopped_0", "stopped_15", "stopped_30", "stopped_45", "total_stopped",
-                "notstopped_0", "notstopped_15", "notstopped_30", "notstopped_45", "total_notstopped",
-                "total"
-            ),
-            show="headings",
-            yscrollcommand=scrollbar.set)
-        
         # Configure headers and columns
         headers = {
             "period": "Interval",
@@ -230,13 +370,10 @@ class DelayStudyApp:
             "total_notstopped": "Total Not Stopped",
             "total": "Total Volume"
         }
-        
-        for col, heading in headers.items():
-            self.tree.heading(col, text=heading)
-            self.tree.column(col, width=80)
-        
-        self.tree.pack(fill="both", expand=True, side="left")
-        scrollbar.config(command=self.tree.yview)
+
+        # Virtualized table: only the visible rows exist as Treeview items
+        self.table = VirtualTable(rows_frame, self.data, headers)
+        self.tree = self.table.tree
 
         # --- Action Buttons ---
         action_frame = ttk.Frame(root)
@@ -244,33 +381,279 @@ class DelayStudyApp:
         
         ttk.Button(action_frame, text="Calculate Results", 
                   command=self.calculate_results).pack(side="left", padx=5)
+        # Bootstrap confidence intervals alongside the point estimates
+        self.intervals_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(action_frame, text="Confidence intervals",
+                        variable=self.intervals_var).pack(side="left", padx=5)
+        ttk.Button(action_frame, text="Validate Data",
+                  command=self.validate_data).pack(side="left", padx=5)
         ttk.Button(action_frame, text="Generate Form 2", 
                   command=self.generate_form2).pack(side="left", padx=5)
+        ttk.Button(action_frame, text="Open Data",
+                  command=self.open_data).pack(side="left", padx=5)
         ttk.Button(action_frame, text="Save Data", 
                   command=self.save_data).pack(side="left", padx=5)
         ttk.Button(action_frame, text="Clear All Data", 
                   command=self.clear_data).pack(side="left", padx=5)
+        # Combined results of all observers when DELAY_SERVER is set
+        self.sync_status_var = tk.StringVar()
+        ttk.Label(action_frame, textvariable=self.sync_status_var).pack(side="right", padx=5)
+
+        # Stream counting events to the aggregation server, if one is configured
+        self.start_sync()
+        # Journal every counting event so a crash or sleep loses nothing
+        self.start_journal()
+        if self.sync is not None and self.journal is None:
+            for var in self.study_info_vars():
+                var.trace_add("write", self.record_study_info)
+            self.record_study_info()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def start_journal(self):
+        """Offer to restore an unsaved session from this app's journal, then start journaling."""
+        self.journal = None
+        path = delay_journal.journal_path()
+        if path is None:
+            return
+        try:
+            # Every running app writes its own journal
+            path, lock = delay_journal.claim(path)
+        except OSError as e:
+            messagebox.showwarning("Session Journal", f"Session journal disabled: {str(e)}")
+            return
+        events = delay_journal.read_events(path)
+        entries = sum(1 for e in events if e[0] == "entry")
+        saved = [e[1] for e in events if e[0] == "saved"]
+        if saved:
+            question = (f"{entries} minutes recorded after saving to {os.path.basename(saved[-1])} "
+                        f"were not saved. Restore the session?")
+        else:
+            question = f"An unsaved session with {entries} recorded minutes was found. Restore it?"
+        restore = entries > 0 and messagebox.askyesno("Restore Session", question)
+        if restore:
+            self.replay_journal(events)
+        try:
+            # Start a fresh file; a restored session is rewritten without any torn tail
+            self.journal = delay_journal.SessionJournal(path, truncate=True, lock=lock)
+        except OSError as e:
+            lock.close()
+            messagebox.showwarning("Session Journal", f"Session journal disabled: {str(e)}")
+            return
+        if restore:
+            for event in events:
+                self.journal_event(*event)
+        for var in self.study_info_vars():
+            var.trace_add("write", self.record_study_info)
+        if not restore:
+            self.record_study_info()
+
+    def start_sync(self):
+        self.sync = None
+        # Checked before the import so single-observer starts never load asyncio
+        if not os.environ.get("DELAY_SERVER"):
+            return
+        import delay_sync
+
+        address = delay_sync.server_address()
+        self.sync = delay_sync.SyncClient(*address)
+        self.sync_status_var.set(f"Connecting to {address[0]}:{address[1]}...")
+        self.poll_sync()
+
+    def poll_sync(self):
+        """Show the latest combined results; runs every half second on the Tk thread."""
+        import delay_sync
+
+        summary = self.sync.poll()
+        if summary is not None:
+            self.sync_status_var.set(delay_sync.results_text(summary))
+        elif not self.sync.connected:
+            self.sync_status_var.set(f"Aggregation server {self.sync.host}:{self.sync.port} unreachable, retrying")
+        self.root.after(500, self.poll_sync)
+
+    def study_info_vars(self):
+        return [self.date_var, self.intersection_var, self.weather_var,
+                self.start_hour_var, self.start_minute_var, self.start_second_var, self.num_periods_var]
+
+    def record_study_info(self, *args):
+        self.journal_event("info", *(var.get() for var in self.study_info_vars()))
+
+    def journal_event(self, kind, *fields):
+        if self.journal is not None:
+            self.journal.record(kind, *fields)
+        if self.sync is not None:
+            self.sync.send(kind, *fields)
+
+    def replay_journal(self, events):
+        """Rebuild the session from journal events (see delay_journal)."""
+        last_entry = None
+        for event in events:
+            kind = event[0]
+            if kind == "entry":
+                _, period, minute, direction, stopped, u_st, notstopped, u_ns = event
+                self.unique_store.set_minute(period, direction, minute, u_st, u_ns)
+                self.data.append(period, minute, direction, stopped, u_st, notstopped, u_ns)
+                last_entry = (period, minute, direction)
+            elif kind == "unique":
+                _, period, direction, minute, stopped, notstopped = event
+                self.unique_store.set_minute(period, direction, minute, stopped, notstopped)
+            elif kind == "volume":
+                _, period, direction, count = event
+                self.approach_volume[(period, direction)] = count
+            elif kind == "info":
+                for var, value in zip(self.study_info_vars(), event[1:]):
+                    var.set(value)
+            elif kind == "saved":
+                # The minutes recorded before the save come back from the saved file
+                import delay_io
 
-    def calculate_actual_time(self, period, minute):
-        """Calculate actual time based on start time, period, and minute."""
+                try:
+                    data, unique_minute_map, _ = delay_io.load_raw(event[1])
+                except Exception as e:
+                    messagebox.showwarning("Restore Session", f"Could not reopen {event[1]}: {str(e)}")
+                    continue
+                self.data.extend_store(data)
+                for (period, direction, minute), split in unique_minute_map.items():
+                    self.unique_store.set_minute(period, direction, minute, split["stopped"], split["notstopped"])
+                if len(data):
+                    last_entry = data.row(len(data) - 1)[:3]
+
+        self.table.refresh()
+        self.resume_after(last_entry)
+
+    def resume_after(self, last_entry):
+        """Continue counting at the minute after last_entry (period, minute, direction), if any."""
+        if last_entry is not None:
+            period, minute, direction = last_entry
+            if minute < 15:
+                minute += 1
+            elif period < self.num_periods():
+                period, minute = period + 1, 1
+            self.period_var.set(period_label(period))
+            self.minute_var.set(str(minute))
+            self.direction_var.set(direction)
+        self.on_period_or_direction_change()
+
+    def on_close(self):
+        self.clock.stop()
+        if self.sync is not None:
+            self.sync.close()
+        if self.journal is not None:
+            # Nothing unsaved: the next start has nothing to restore
+            if not self.data or self.session_version() == self.saved_version:
+                self.journal.clear()
+            self.journal.close()
+        if self.repository is not None:
+            self.repository.close()
+        if self.profiler is not None:
+            try:
+                self.profiler.dump(self.profile_path)
+            except OSError as e:
+                print(f"Could not write callback timing to {self.profile_path}: {e}", file=sys.stderr)
+        self.root.destroy()
+
+    def on_table_filter_change(self, event=None):
+        period = self.filter_period_var.get()
+        direction = self.filter_direction_var.get()
+        self.table.set_filter(None if period == "All" else int(period),
+                              None if direction == "All" else direction)
+
+    def num_periods(self):
+        """Configured study length in 15-minute periods."""
         try:
-            start_hour = int(self.start_hour_var.get())
-            start_minute = int(self.start_minute_var.get())
-            start_second = int(self.start_second_var.get())
-            
-            # Calculate total minutes from start
-            total_minutes = (period - 1) * 15 + (minute - 1)
-            
-            # Add to start time
-            current_minute = start_minute + total_minutes
-            current_hour = start_hour + (current_minute // 60)
-            current_minute = current_minute % 60
-            
-            return f"{current_hour:02d}:{current_minute:02d}:{start_second:02d}"
+            return min(max(int(self.num_periods_var.get()), 1), MAX_PERIODS)
         except ValueError:
-            return "00:00:00"
+            return DEFAULT_PERIODS
+
+    def update_period_choices(self, *args):
+        """Regenerate the period comboboxes for the configured study length."""
+        num_periods = self.num_periods()
+        self.period_combo["values"] = [period_label(p) for p in range(1, num_periods + 1)]
+        self.filter_period_combo["values"] = ["All"] + [str(p) for p in range(1, num_periods + 1)]
+        minutes = num_periods * 15
+        self.study_length_var.set(f"x 15-min periods ({minutes // 60} h {minutes % 60:02d} min)")
+
+    def study_info(self):
+        """Study metadata as the dict delay_io and delay_repository use."""
+        return {"date": self.date_var.get(), "intersection": self.intersection_var.get(),
+                "weather": self.weather_var.get(), "start_time": self.start_time_text()}
+
+    def store_in_repository(self, results):
+        """Save the session and its results to the study repository, if DELAY_REPOSITORY is set."""
+        import delay_repository
+
+        path = delay_repository.repository_path()
+        if path is None:
+            return
+        import sqlite3
+
+        try:
+            if self.repository is None:
+                self.repository = delay_repository.StudyRepository(path)
+            self.repository.save_session(self.study_info(), self.data, self.unique_minute_map, results,
+                                         self.num_periods())
+        except (sqlite3.Error, OSError) as e:
+            messagebox.showwarning("Study Repository", f"Could not save to the study repository: {str(e)}")
+
+    def profiled(self, name):
+        """Context manager timing a section under name when DELAY_PROFILE is set."""
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.section(name)
+
+    def session_version(self):
+        """Increases on every change to the minute rows or the unique splits.
+
+        add_entry, the unique counters, Unique Assist, journal replay and
+        clear_data all go through the two stores, which count their changes.
+        """
+        return self.data.version + self.unique_store.version
+
+    def cached_results(self):
+        """DelayResults for the session, recomputed only when the version or study length changed."""
+        key = (self.session_version(), self.num_periods())
+        if key != self.results_key:
+            import delay_engine
+
+            self.results = delay_engine.calculate(self.data, self.unique_minute_map, key[1])
+            self.results_intervals = None
+            self.results_key = key
+        return self.results
+
+    def cached_intervals(self):
+        """Bootstrap confidence intervals of cached_results(), computed once per version."""
+        results = self.cached_results()
+        if self.results_intervals is None:
+            import delay_engine
+
+            self.results_intervals = delay_engine.bootstrap_intervals(results)
+        return self.results_intervals
+
+    def cached_validation(self):
+        """delay_validate report of the session, computed once per version."""
+        version = self.session_version()
+        if version != self.validation_key:
+            import delay_validate
+
+            self.validation = delay_validate.validate(self.data, self.unique_minute_map)
+            self.validation_key = version
+        return self.validation
+
+    def start_time_text(self):
+        return f"{self.start_hour_var.get()}:{self.start_minute_var.get()}:{self.start_second_var.get()}"
+
+    def toggle_keyboard_mode(self):
+        if self.keyboard_mode_var.get():
+            self.root.bind("<KeyPress>", self.keyboard.on_key)
+            # Take focus away from the entry fields so keystrokes are counted
+            self.root.focus_set()
+            self.hotkey_help_var.set(self.hotkey_summary)
+        else:
+            self.keyboard.flush()
+            self.root.unbind("<KeyPress>")
+            self.hotkey_help_var.set("")
 
     def increment_count(self, var):
+        self.keyboard.flush()
         try:
             current = int(var.get())
             var.set(str(current + 1))
@@ -278,6 +661,7 @@ class DelayStudyApp:
             var.set("1")
 
     def decrement_count(self, var):
+        self.keyboard.flush()
         try:
             current = int(var.get())
             if current > 0:
@@ -285,14 +669,58 @@ class DelayStudyApp:
         except ValueError:
             var.set("0")
 
+    def toggle_clock(self):
+        if self.clock.running:
+            self.stop_clock()
+        else:
+            self.clock_button.config(text="Stop Clock")
+            self.clock.start()
+
+    def stop_clock(self):
+        self.clock.stop()
+        self.clock_button.config(text="Start Clock")
+        self.clock_status_var.set("")
+        self.highlight_interval(None)
+
+    def highlight_interval(self, interval):
+        for i, headings in enumerate(self.interval_headings):
+            for heading in headings:
+                heading.config(style="ActiveInterval.TLabel" if i == interval else "TLabel")
+
+    def on_clock_tick(self, index, lateness):
+        """Sampling instant index of the clock: move the highlight, add the entry each minute."""
+        interval = index % delay_clock.INTERVALS_PER_MINUTE
+        if index and interval == 0:
+            period = int(self.period_var.get().split()[0])
+            last_minute = period >= self.num_periods() and int(self.minute_var.get()) >= 15
+            if last_minute:
+                # Stop first so no tick fires while the Study Complete dialog is open
+                self.stop_clock()
+            self.add_entry()
+            if last_minute:
+                return
+        self.highlight_interval(interval)
+        # Actual sample time; lateness shows how long the Tk loop held the tick back
+        sampled_at = datetime.now().isoformat(timespec="milliseconds")
+        self.journal_event("sample", index, int(self.period_var.get().split()[0]), int(self.minute_var.get()),
+                           interval, sampled_at, round(lateness * 1000, 1))
+        status = f"Counting {15 * interval}-{15 * (interval + 1)} sec (sample {index} at {sampled_at[11:]}"
+        if lateness >= 0.1:
+            status += f", {lateness:.1f} s late"
+        self.clock_status_var.set(status + ")")
+
     def reset_counts(self):
+        self.keyboard.flush()
         for var in self.interval_vars:
             var.set("0")
         for var in self.notstopped_vars:
             var.set("0")
+        self.keyboard.reset()
 
     def next_minute(self):
         """Automatically progress to the next minute within the current period."""
+        # Unique counts still pending belong to the minute being left
+        self.keyboard.flush()
         current_minute = int(self.minute_var.get())
         if current_minute < 15:  # 1-15 minutes in each 15-minute period
             self.minute_var.set(str(current_minute + 1))
@@ -301,16 +729,19 @@ class DelayStudyApp:
         else:
             # Move to next period
             current_period = int(self.period_var.get().split()[0])
-            if current_period < 4:
+            num_periods = self.num_periods()
+            if current_period < num_periods:
                 next_period = current_period + 1
-                self.period_var.set(f"{next_period} ({15*(next_period-1)}-{15*next_period} min)")
+                self.period_var.set(period_label(next_period))
                 self.minute_var.set("1")
                 # Reset tally display for new period; load if previously saved
                 self.on_period_or_direction_change()
             else:
-                messagebox.showinfo("Study Complete", "All 4 periods (60 minutes) have been completed!")
+                messagebox.showinfo("Study Complete",
+                                    f"All {num_periods} periods ({num_periods * 15} minutes) have been completed!")
 
     def add_entry(self):
+        self.keyboard.flush()
         try:
             period = int(self.period_var.get().split()[0])
             minute = int(self.minute_var.get())
@@ -338,24 +769,19 @@ class DelayStudyApp:
                 "notstopped": unique_notstopped_count
             })
             
-            unique_total_minute = unique_stopped_count + unique_notstopped_count
-
-            # Create data tuple with all values including period, using unique totals for 'Total Stopped' and 'Total Volume'
-            entry_data = (
-                period, minute, direction, 
-                *stopped_counts, unique_stopped_count,
-                *notstopped_counts, unique_notstopped_count,
-                unique_total_minute
-            )
-            self.data.append(entry_data)
-            # Recompute aggregates per (period, direction)
-            self.recompute_unique_aggregates()
+            # Store the row with the unique totals as 'Total Stopped' / 'Total Not Stopped'
+            self.data.append(period, minute, direction, stopped_counts, unique_stopped_count,
+                             notstopped_counts, unique_notstopped_count)
+            self.journal_event("entry", period, minute, direction, stopped_counts, unique_stopped_count,
+                               notstopped_counts, unique_notstopped_count)
+            # Aggregates per (period, direction) were updated by set_unique_minute
+            self.update_approach_volume_display()
             # Clear temp unique once used
             self.current_unique_stopped = None
             self.current_unique_notstopped = None
 
-            # Add to treeview
-            self.tree.insert("", "end", values=entry_data)
+            # Show the new row in the table
+            self.table.refresh()
 
             # Auto-progress to next minute and reset counts
             self.next_minute()
@@ -406,20 +832,19 @@ class DelayStudyApp:
         result_lbl.grid(row=6, column=0, columnspan=4, pady=10)
 
         def compute_unique():
+            import delay_engine
+
             def safe_int(v):
                 try:
                     return max(0, int(v))
                 except Exception:
                     return 0
-            same15_s = safe_int(same_stopped_vars["+15 sec"].get())
-            same30_s = safe_int(same_stopped_vars["+30 sec"].get())
-            same45_s = safe_int(same_stopped_vars["+45 sec"].get())
-            same15_n = safe_int(same_notstopped_vars["+15 sec"].get())
-            same30_n = safe_int(same_notstopped_vars["+30 sec"].get())
-            same45_n = safe_int(same_notstopped_vars["+45 sec"].get())
+            same_s = [safe_int(same_stopped_vars[label].get()) for label, _, _ in intervals]
+            same_n = [safe_int(same_notstopped_vars[label].get()) for label, _, _ in intervals]
 
-            u_stopped = max(0, s0) + max(0, s15 - same15_s) + max(0, s30 - same30_s) + max(0, s45 - same45_s)
-            u_notstopped = max(0, n0) + max(0, n15 - same15_n) + max(0, n30 - same30_n) + max(0, n45 - same45_n)
+            # Same rule as Batch Unique Assist, for this one minute
+            u_stopped = int(delay_engine.unique_from_snapshots([s0, s15, s30, s45], same_s))
+            u_notstopped = int(delay_engine.unique_from_snapshots([n0, n15, n30, n45], same_n))
 
             self.current_unique_stopped = u_stopped
             self.current_unique_notstopped = u_notstopped
@@ -428,6 +853,11 @@ class DelayStudyApp:
         def use_and_close():
             if self.current_unique_stopped is None:
                 compute_unique()
+            # add_entry records the inline counters, so the result goes there
+            self.keyboard.flush()
+            self.unique_minute_stopped_var.set(str(self.current_unique_stopped))
+            self.unique_minute_notstopped_var.set(str(self.current_unique_notstopped))
+            self.persist_unique_minute()
             win.destroy()
 
         btns = ttk.Frame(container)
@@ -436,6 +866,44 @@ class DelayStudyApp:
         ttk.Button(btns, text="Use These", command=use_and_close).pack(side="left", padx=5)
         ttk.Button(btns, text="Cancel", command=win.destroy).pack(side="left", padx=5)
 
+    def batch_unique_assist(self):
+        """Recompute the unique split of every minute listed in a carry-over file.
+
+        The file (xlsx or csv) has one row per minute with Interval, Minute,
+        Direction and the same-as-previous columns of delay_io.CARRYOVER_COLUMNS;
+        a saved raw-data file with those columns added works too.
+        """
+        if not self.data:
+            messagebox.showwarning("No Data", "Please add some entries first.")
+            return
+        filename = filedialog.askopenfilename(
+            title="Carry-over counts",
+            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+
+        import delay_engine
+        import delay_io
+
+        try:
+            carryovers = delay_io.load_carryovers(filename)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Batch Unique Assist", f"Could not read carry-overs: {str(e)}")
+            return
+        splits = delay_engine.batch_unique(self.data, carryovers)
+        for (period, direction, minute), (u_st, u_ns) in splits.items():
+            self.set_unique_minute(period, direction, minute, {"stopped": u_st, "notstopped": u_ns})
+            self.journal_event("unique", period, direction, minute, u_st, u_ns)
+        self.load_unique_counter_for_current_context()
+        self.update_approach_volume_display()
+
+        message = f"Updated the unique splits of {len(splits)} minutes."
+        skipped = len(carryovers) - len(splits)
+        if skipped:
+            message += f"\n{skipped} minutes in the file have no recorded entry and were skipped."
+        messagebox.showinfo("Batch Unique Assist", message)
+
     def save_approach_volume(self):
         """Save observed approach volume for current 15-minute period and direction."""
         try:
@@ -443,12 +911,16 @@ class DelayStudyApp:
             direction = self.direction_var.get()
             count = int(self.approach_volume_var.get())
             self.approach_volume[(period, direction)] = count
+            self.journal_event("volume", period, direction, count)
             messagebox.showinfo("Saved", f"Saved {count} vehicles for Period {period} - {direction}")
         except ValueError:
             messagebox.showerror("Invalid Input", "Approach volume must be a whole number.")
 
     def on_period_or_direction_change(self, event=None):
         """Load saved tally for selected period/direction, else clear to 0."""
+        # The selection has already changed, but pending unique keystrokes
+        # belong to the minute the counters still show
+        self.keyboard.flush(on_unique=lambda: self.persist_unique_minute(self.unique_context))
         try:
             period = int(self.period_var.get().split()[0])
         except Exception:
@@ -460,14 +932,12 @@ class DelayStudyApp:
         self.load_unique_counter_for_current_context()
 
     def get_unique_minute(self, period, direction, minute):
-        return self.unique_minute_map.get((period, direction, minute))
+        return self.unique_store.get_minute(period, direction, minute)
 
     def set_unique_minute(self, period, direction, minute, value):
-        # value is a dict {"stopped": int, "notstopped": int}
-        self.unique_minute_map[(period, direction, minute)] = {
-            "stopped": max(0, int(value.get("stopped", 0))),
-            "notstopped": max(0, int(value.get("notstopped", 0)))
-        }
+        # value is a dict {"stopped": int, "notstopped": int}; totals are updated by delta
+        self.unique_store.set_minute(period, direction, minute,
+                                     value.get("stopped", 0), value.get("notstopped", 0))
 
     def load_unique_counter_for_current_context(self):
         try:
@@ -477,6 +947,7 @@ class DelayStudyApp:
             period = 1
             minute = 1
         direction = self.direction_var.get()
+        self.unique_context = (period, direction, minute)
         v = self.get_unique_minute(period, direction, minute)
         if v is None:
             self.unique_minute_stopped_var.set("0")
@@ -486,6 +957,7 @@ class DelayStudyApp:
             self.unique_minute_notstopped_var.set(str(v.get("notstopped", 0)))
 
     def increment_unique_minute(self, is_stopped):
+        self.keyboard.flush()
         if is_stopped:
             try:
                 current = int(self.unique_minute_stopped_var.get())
@@ -500,17 +972,26 @@ class DelayStudyApp:
                 current = 0
             new_val = current + 1
             self.unique_minute_notstopped_var.set(str(new_val))
-        # Persist and aggregate
-        period = int(self.period_var.get().split()[0])
-        minute = int(self.minute_var.get())
-        direction = self.direction_var.get()
+        self.persist_unique_minute()
+
+    def persist_unique_minute(self, context=None):
+        """Store the unique counters for the current minute (or context) and update the aggregates."""
+        if context is not None:
+            period, direction, minute = context
+        else:
+            period = int(self.period_var.get().split()[0])
+            minute = int(self.minute_var.get())
+            direction = self.direction_var.get()
         self.set_unique_minute(period, direction, minute, {
             "stopped": int(self.unique_minute_stopped_var.get() or 0),
             "notstopped": int(self.unique_minute_notstopped_var.get() or 0)
         })
-        self.recompute_unique_aggregates()
+        v = self.get_unique_minute(period, direction, minute)
+        self.journal_event("unique", period, direction, minute, v["stopped"], v["notstopped"])
+        self.update_approach_volume_display()
 
     def reset_unique_minute(self):
+        self.keyboard.flush()
         self.unique_minute_stopped_var.set("0")
         self.unique_minute_notstopped_var.set("0")
         try:
@@ -520,19 +1001,10 @@ class DelayStudyApp:
             return
         direction = self.direction_var.get()
         self.set_unique_minute(period, direction, minute, {"stopped": 0, "notstopped": 0})
-        self.recompute_unique_aggregates()
-
-    def recompute_unique_aggregates(self):
-        # Sum per (period, direction) from per-minute unique totals
-        agg = {}
-        for (p, d, m), val in self.unique_minute_map.items():
-            if (p, d) not in agg:
-                agg[(p, d)] = {"stopped": 0, "notstopped": 0}
-            agg[(p, d)]["stopped"] += int(val.get("stopped", 0))
-            agg[(p, d)]["notstopped"] += int(val.get("notstopped", 0))
-        self.unique_map = agg
-        # Keep approach_volume in sync for compatibility and display
-        self.approach_volume = {k: v["stopped"] + v["notstopped"] for k, v in self.unique_map.items()}
+        self.journal_event("unique", period, direction, minute, 0, 0)
+        self.update_approach_volume_display()
+
+    def update_approach_volume_display(self):
         # Update displayed approach tally for current selection
         try:
             period = int(self.period_var.get().split()[0])
@@ -546,125 +1018,18 @@ class DelayStudyApp:
             messagebox.showwarning("No Data", "Please add some entries first.")
             return
 
-        # Calculate results by period and direction
-        results_by_period_direction = {}
-        results_by_period_overall = {}
-        overall_results_by_direction = {}
-        
-        for period in range(1, 5):
-            results_by_period_direction[period] = {}
-            # Aggregate period totals across directions
-            period_rows = [d for d in self.data if d[0] == period]
-            if period_rows:
-                # Calculate total stopped vehicles (sum of all 15-second interval counts) for this period
-                p_total_stopped_all_intervals = 0
-                for direction in ["North", "South", "East", "West"]:
-                    direction_data = [d for d in self.data if d[0] == period and d[2] == direction]
-                    for row in direction_data:
-                        # Sum all stopped counts: stopped_0 + stopped_15 + stopped_30 + stopped_45
-                        p_total_stopped_all_intervals += sum(row[3:7])  # indices 3-6 are stopped counts
-                
-                # Use UNIQUE stopped totals for approach volume calculation
-                p_total_stopped_unique = 0
-                for direction in ["North", "South", "East", "West"]:
-                    u = self.unique_map.get((period, direction), {"stopped": 0, "notstopped": 0})
-                    p_total_stopped_unique += u["stopped"]
-                
-                # Approach volume for period = sum of unique per direction for this period
-                p_total_vehicles = 0
-                for direction in ["North", "South", "East", "West"]:
-                    u = self.unique_map.get((period, direction), {"stopped": 0, "notstopped": 0})
-                    p_total_vehicles += (u["stopped"] + u["notstopped"])
-                
-                if p_total_vehicles > 0:
-                    # Total Delay = Total Number Stopped (not unique) * 15 seconds
-                    p_total_delay = p_total_stopped_all_intervals * 15
-                    # Average Delay per Stopped Vehicle = Total Delay / Number Stopped (Unique)
-                    p_avg_delay_stopped = p_total_delay / p_total_stopped_unique if p_total_stopped_unique > 0 else 0
-                    # Average Delay per Approach Vehicle = Total Delay / Total Approach Volume
-                    p_avg_delay_approach = p_total_delay / p_total_vehicles
-                    # Percent of Vehicles Stopped = Number Stopped (Unique) / Approach Volume
-                    p_percent_stopped = (p_total_stopped_unique / p_total_vehicles) * 100
-                    results_by_period_overall[period] = {
-                        "Total Vehicles": p_total_vehicles,
-                        "Total Stopped": p_total_stopped_all_intervals,
-                        "Total Stopped Unique": p_total_stopped_unique,
-                        "Total Delay (sec)": p_total_delay,
-                        "Avg Delay per Stopped (sec)": p_avg_delay_stopped,
-                        "Avg Delay per Approach (sec)": p_avg_delay_approach,
-                        "Percent Stopped": p_percent_stopped
-                    }
-            for direction in ["North", "South", "East", "West"]:
-                # Filter data for this period and direction (period is now index 0, direction is index 2)
-                period_direction_data = [d for d in self.data if d[0] == period and d[2] == direction]
-                if period_direction_data:
-                    # Calculate total stopped vehicles (sum of all 15-second interval counts) for this period+direction
-                    total_stopped_all_intervals = 0
-                    for row in period_direction_data:
-                        # Sum all stopped counts: stopped_0 + stopped_15 + stopped_30 + stopped_45
-                        total_stopped_all_intervals += sum(row[3:7])  # indices 3-6 are stopped counts
-                    
-                    # Use UNIQUE stopped and UNIQUE approach volume for this period+direction
-                    u = self.unique_map.get((period, direction), {"stopped": 0, "notstopped": 0})
-                    total_vehicles = u["stopped"] + u["notstopped"]
-                    
-                    if total_vehicles > 0:
-                        # Total Delay = Total Number Stopped (not unique) * 15 seconds
-                        total_delay = total_stopped_all_intervals * 15
-                        # Average Delay per Stopped Vehicle = Total Delay / Number Stopped (Unique)
-                        avg_delay_stopped = total_delay / u["stopped"] if u["stopped"] > 0 else 0
-                        # Average Delay per Approach Vehicle = Total Delay / Total Approach Volume
-                        avg_delay_approach = total_delay / total_vehicles
-                        # Percent of Vehicles Stopped = Number Stopped (Unique) / Approach Volume
-                        percent_stopped = (u["stopped"] / total_vehicles) * 100
-                        
-                        results_by_period_direction[period][direction] = {
-                            "Total Vehicles": total_vehicles,
-                            "Total Stopped": total_stopped_all_intervals,
-                            "Total Stopped Unique": u["stopped"],
-                            "Total Delay (sec)": total_delay,
-                            "Avg Delay per Stopped (sec)": avg_delay_stopped,
-                            "Avg Delay per Approach (sec)": avg_delay_approach,
-                            "Percent Stopped": percent_stopped
-                        }
-        
-        # Calculate overall results by direction
-        for direction in ["North", "South", "East", "West"]:
-            direction_data = [d for d in self.data if d[2] == direction]
-            if direction_data:
-                # Calculate total stopped vehicles (sum of all 15-second interval counts) for this direction across all periods
-                total_stopped_all_intervals = 0
-                for row in direction_data:
-                    # Sum all stopped counts: stopped_0 + stopped_15 + stopped_30 + stopped_45
-                    total_stopped_all_intervals += sum(row[3:7])  # indices 3-6 are stopped counts
-                
-                # Use UNIQUE stopped and UNIQUE approach volume overall for direction across all periods
-                total_vehicles = 0
-                total_stopped_unique = 0
-                for period in range(1, 5):
-                    u = self.unique_map.get((period, direction), {"stopped": 0, "notstopped": 0})
-                    total_vehicles += (u["stopped"] + u["notstopped"])
-                    total_stopped_unique += u["stopped"]
-                
-                if total_vehicles > 0:
-                    # Total Delay = Total Number Stopped (not unique) * 15 seconds
-                    total_delay = total_stopped_all_intervals * 15
-                    # Average Delay per Stopped Vehicle = Total Delay / Number Stopped (Unique)
-                    avg_delay_stopped = total_delay / total_stopped_unique if total_stopped_unique > 0 else 0
-                    # Average Delay per Approach Vehicle = Total Delay / Total Approach Volume
-                    avg_delay_approach = total_delay / total_vehicles
-                    # Percent of Vehicles Stopped = Number Stopped (Unique) / Approach Volume
-                    percent_stopped = (total_stopped_unique / total_vehicles) * 100
-                    
-                    overall_results_by_direction[direction] = {
-                        "Total Vehicles": total_vehicles,
-                        "Total Stopped": total_stopped_all_intervals,
-                        "Total Stopped Unique": total_stopped_unique,
-                        "Total Delay (sec)": total_delay,
-                        "Avg Delay per Stopped (sec)": avg_delay_stopped,
-                        "Avg Delay per Approach (sec)": avg_delay_approach,
-                        "Percent Stopped": percent_stopped
-                    }
+        with self.profiled("calculate_results"):
+            report = self.cached_validation()
+            # Results by period and direction, reused until the session changes
+            results = self.cached_results()
+            intervals = self.cached_intervals() if self.intervals_var.get() else None
+
+        # Missing, duplicate or impossible minutes would skew the results: ask first
+        if report.errors and not messagebox.askyesno(
+                "Validation", f"{report.text()}\n\nCalculate results anyway?", icon="warning"):
+            return
+
+        import delay_io
 
         try:
             filename = filedialog.asksaveasfilename(
@@ -673,77 +1038,39 @@ class DelayStudyApp:
                 initialfile="Intersection_Delay_Results.xlsx"
             )
             if filename:
-                # Create DataFrame for overall results
-                overall_results_data = []
-                for direction, data in overall_results_by_direction.items():
-                    overall_results_data.append({
-                        "Direction": direction,
-                        **data
-                    })
-                
-                overall_df = pd.DataFrame(overall_results_data)
-                
-                # Create DataFrame for period-by-period results (by direction)
-                period_results_data = []
-                for period in range(1, 5):
-                    for direction, data in results_by_period_direction[period].items():
-                        period_results_data.append({
-                            "Period": period,
-                            "Direction": direction,
-                            **data
-                        })
-                
-                period_df = pd.DataFrame(period_results_data)
-
-                # Create DataFrame for period summaries (all directions combined)
-                period_overall_results_data = []
-                for period in sorted(results_by_period_overall.keys()):
-                    period_overall_results_data.append({
-                        "Period": period,
-                        **results_by_period_overall[period]
-                    })
-                period_overall_df = pd.DataFrame(period_overall_results_data)
-                
-                # Write to Excel with proper formatting
-                with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                    # Write study information
-                    info_df = pd.DataFrame([
-                        ["Intersection Delay Study Results"],
-                        ["Date:", self.date_var.get()],
-                        ["Intersection:", self.intersection_var.get()],
-                        ["Weather:", self.weather_var.get()],
-                        [""]
-                    ])
-                    info_df.to_excel(writer, sheet_name='Overall Results', index=False, header=False)
-                    
-                    # Write overall results data
-                    overall_df.to_excel(writer, sheet_name='Overall Results', index=False, startrow=len(info_df))
-                    
-                    # Write period-by-period results to separate sheet
-                    period_df.to_excel(writer, sheet_name='Period Results', index=False)
-
-                    # Write period summary sheet
-                    period_overall_df.to_excel(writer, sheet_name='Period Summary', index=False)
-                    
-                    # Auto-adjust columns width
-                    for sheet_name in ['Overall Results', 'Period Results', 'Period Summary']:
-                        worksheet = writer.sheets[sheet_name]
-                        if sheet_name == 'Overall Results':
-                            df_to_adjust = overall_df
-                        elif sheet_name == 'Period Results':
-                            df_to_adjust = period_df
-                        else:
-                            df_to_adjust = period_overall_df
-                        for idx, col in enumerate(df_to_adjust.columns):
-                            worksheet.column_dimensions[chr(65 + idx)].width = 20
+                with self.profiled("write_results"):
+                    delay_io.write_results_workbook(filename, results, self.date_var.get(),
+                                                    self.intersection_var.get(), self.weather_var.get(), intervals)
+                    self.store_in_repository(results)
 
                 messagebox.showinfo("Success", f"Results saved to {filename}")
-                self.show_results_popup(overall_results_by_direction, results_by_period_direction, results_by_period_overall)
+                self.show_results_popup(results, intervals)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error saving results: {str(e)}")
 
-    def show_results_popup(self, overall_results_by_direction, results_by_period_direction, results_by_period_overall):
+    def validate_data(self):
+        if not self.data:
+            messagebox.showwarning("No Data", "Please add some entries first.")
+            return
+        report = self.cached_validation()
+        if report.ok:
+            messagebox.showinfo("Validation", report.summary())
+        else:
+            messagebox.showwarning("Validation", report.text())
+
+    def show_results_popup(self, delay_results, intervals=None):
+        overall_results_by_direction = delay_results.by_direction
+        results_by_period_direction = delay_results.by_period_direction
+        results_by_period_overall = delay_results.by_period
+
+        def ci(bounds, metric, fmt=".1f"):
+            # " (95% CI low-high)" when intervals were computed
+            if bounds is None:
+                return ""
+            low, high = bounds[metric]
+            return f" ({intervals.confidence:.0%} CI {low:{fmt}}-{high:{fmt}})"
+
         results = f"Intersection: {self.intersection_var.get()}\n"
         results += f"Date: {self.date_var.get()}\n"
         results += f"Weather: {self.weather_var.get()}\n\n"
@@ -751,140 +1078,167 @@ class DelayStudyApp:
         # Overall Results
         results += "=== OVERALL STUDY RESULTS ===\n"
         for direction, data in overall_results_by_direction.items():
+            bounds = intervals.by_direction[direction] if intervals is not None else None
             results += f"\n{direction} Approach:\n"
-            results += f"Total Vehicles: {data['Total Vehicles']}\n"
-            results += f"Total Stopped (all intervals): {data['Total Stopped']}\n"
-            results += f"Total Stopped (unique): {data['Total Stopped Unique']}\n"
-            results += f"Total Delay: {data['Total Delay (sec)']:.1f} seconds\n"
-            results += f"Avg Delay per Stopped Vehicle: {data['Avg Delay per Stopped (sec)']:.1f} seconds\n"
-            results += f"Avg Delay per Approach Vehicle: {data['Avg Delay per Approach (sec)']:.1f} seconds\n"
-            results += f"Percent Stopped: {data['Percent Stopped']:.1f}%\n"
+            results += f"Total Vehicles: {data['Total Vehicles']}{ci(bounds, 'Total Vehicles', '.0f')}\n"
+            results += f"Total Stopped (all intervals): {data['Total Stopped']}{ci(bounds, 'Total Stopped', '.0f')}\n"
+            results += (f"Total Stopped (unique): {data['Total Stopped Unique']}"
+                        f"{ci(bounds, 'Total Stopped Unique', '.0f')}\n")
+            results += f"Total Delay: {data['Total Delay (sec)']:.1f} seconds{ci(bounds, 'Total Delay (sec)')}\n"
+            results += (f"Avg Delay per Stopped Vehicle: {data['Avg Delay per Stopped (sec)']:.1f} seconds"
+                        f"{ci(bounds, 'Avg Delay per Stopped (sec)')}\n")
+            results += (f"Avg Delay per Approach Vehicle: {data['Avg Delay per Approach (sec)']:.1f} seconds"
+                        f"{ci(bounds, 'Avg Delay per Approach (sec)')}\n")
+            results += f"Percent Stopped: {data['Percent Stopped']:.1f}%{ci(bounds, 'Percent Stopped')}\n"
         
         # Period-by-Period Results (by direction)
         results += "\n\n=== PERIOD-BY-PERIOD RESULTS (by direction) ===\n"
-        for period in range(1, 5):
-            results += f"\nPeriod {period} ({15*(period-1)}-{15*period} minutes):\n"
+        for period in sorted(results_by_period_direction.keys()):
+            results += f"\nPeriod {period_label(period)}:\n"
             for direction, data in results_by_period_direction[period].items():
+                bounds = intervals.by_period_direction[period][direction] if intervals is not None else None
                 results += f"  {direction}: {data['Total Vehicles']} vehicles, "
                 results += f"{data['Total Stopped']} stopped (all intervals), "
                 results += f"{data['Total Stopped Unique']} stopped (unique), "
-                results += f"{data['Avg Delay per Approach (sec)']:.1f}s avg delay\n"
+                results += f"{data['Avg Delay per Approach (sec)']:.1f}s avg delay"
+                results += f"{ci(bounds, 'Avg Delay per Approach (sec)')}\n"
 
         # Period Summaries (all directions combined)
         results += "\n\n=== PERIOD SUMMARIES (all directions) ===\n"
         for period in sorted(results_by_period_overall.keys()):
             data = results_by_period_overall[period]
             results += (
-                f"Period {period}: total={data['Total Vehicles']}, stopped={data['Total Stopped']} (all intervals), "
+                f"Period {period_label(period)}: total={data['Total Vehicles']}, "
+                f"stopped={data['Total Stopped']} (all intervals), "
                 f"stopped_unique={data['Total Stopped Unique']}, delay={data['Total Delay (sec)']:.0f}s, "
                 f"avgStopped={data['Avg Delay per Stopped (sec)']:.1f}s, "
                 f"avgApproach={data['Avg Delay per Approach (sec)']:.1f}s, %stopped={data['Percent Stopped']:.1f}%\n"
             )
 
+        if intervals is not None:
+            bounds = intervals.overall
+            data = delay_results.overall
+            results += f"\n\n=== WHOLE STUDY ({intervals.replicates} bootstrap replicates) ===\n"
+            results += (f"Avg Delay per Stopped Vehicle: {data['Avg Delay per Stopped (sec)']:.1f} seconds"
+                        f"{ci(bounds, 'Avg Delay per Stopped (sec)')}\n")
+            results += (f"Avg Delay per Approach Vehicle: {data['Avg Delay per Approach (sec)']:.1f} seconds"
+                        f"{ci(bounds, 'Avg Delay per Approach (sec)')}\n")
+            results += f"Percent Stopped: {data['Percent Stopped']:.1f}%{ci(bounds, 'Percent Stopped')}\n"
+
         messagebox.showinfo("Delay Study Results", results)
 
     def save_data(self):
         if not self.data:
             messagebox.showwarning("No Data", "No data to save.")
             return
-            
+
+        import delay_io
+
         try:
             filename = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("All files", "*.*")]
+                filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("Parquet files", "*.parquet"),
+                           ("Feather files", "*.feather"), ("All files", "*.*")]
             )
             if filename:
-                # Create DataFrame from collected data, but override totals with UNIQUE split
-                columns = [
-                    "Time", "Interval", "Minute", "Direction",
-                    "Stopped 0-15s", "Stopped 15-30s", "Stopped 30-45s", "Stopped 45-60s", "Total Stopped", "Total Stopped Unique",
-                    "Not Stopped 0-15s", "Not Stopped 15-30s", "Not Stopped 30-45s", "Not Stopped 45-60s",
-                    "Total Not Stopped", "Total Volume"
-                ]
-                # Rebuild rows to ensure Total Stopped / Total Not Stopped are unique per minute
-                rebuilt_rows = []
-                for row in self.data:
-                    period = row[0]
-                    minute = row[1]
-                    direction = row[2]
-                    # Calculate actual time
-                    actual_time = self.calculate_actual_time(period, minute)
-                    # Calculate total stopped (sum of all intervals)
-                    total_stopped_all_intervals = sum(row[3:7])  # indices 3-6 are stopped counts
-                    # Unique split for this minute
-                    usplit = self.unique_minute_map.get((period, direction, minute))
-                    if usplit is None:
-                        # Fallback to original totals if unique not present
-                        u_st = row[7]
-                        u_ns = row[12]
-                    else:
-                        u_st = int(usplit.get("stopped", 0))
-                        u_ns = int(usplit.get("notstopped", 0))
-                    u_total = u_st + u_ns
-                    rebuilt_rows.append([
-                        actual_time, period, minute, direction,
-                        row[3], row[4], row[5], row[6], total_stopped_all_intervals, u_st,
-                        row[8], row[9], row[10], row[11], u_ns, u_total
-                    ])
-                df = pd.DataFrame(rebuilt_rows, columns=columns)
-                
-                if filename.endswith('.xlsx'):
-                    # Add study information at the top
-                    info_df = pd.DataFrame([
-                        ["Intersection Delay Study Raw Data"],
-                        ["Date:", self.date_var.get()],
-                        ["Intersection:", self.intersection_var.get()],
-                        ["Weather:", self.weather_var.get()],
-                        ["Start Time:", f"{self.start_hour_var.get()}:{self.start_minute_var.get()}:{self.start_second_var.get()}"],
-                        [""]
-                    ])
-                    
-                    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                        # Write info
-                        info_df.to_excel(writer, sheet_name='Data', index=False, header=False)
-                        # Write data starting after info rows
-                        df.to_excel(writer, sheet_name='Data', index=False, startrow=len(info_df))
-                        
-                        # Auto-adjust column widths
-                        worksheet = writer.sheets['Data']
-                        for idx, col in enumerate(df.columns):
-                            max_length = max(
-                                df[col].astype(str).apply(len).max(),
-                                len(str(col))
-                            )
-                            worksheet.column_dimensions[chr(65 + idx)].width = max_length + 2
-                
-                elif filename.endswith('.csv'):
-                    with open(filename, 'w', newline='') as csvfile:
-                        writer = csv.writer(csvfile)
-                        writer.writerow(["Intersection Delay Study Raw Data"])
-                        writer.writerow(["Date:", self.date_var.get()])
-                        writer.writerow(["Intersection:", self.intersection_var.get()])
-                        writer.writerow(["Weather:", self.weather_var.get()])
-                        writer.writerow(["Start Time:", f"{self.start_hour_var.get()}:{self.start_minute_var.get()}:{self.start_second_var.get()}"])
-                        writer.writerow([])
-                        writer.writerow(columns)
-                        for row in rebuilt_rows:
-                            writer.writerow(row)
-                
+                with self.profiled("save_data"):
+                    # Rows are rebuilt with Total Stopped / Total Not Stopped unique per minute
+                    info = self.study_info()
+                    if delay_io.is_arrow_file(filename):
+                        # Typed columns with the study info as file metadata (needs pyarrow)
+                        delay_io.write_raw_arrow(filename, self.data, self.unique_minute_map, info)
+                    elif filename.endswith('.xlsx'):
+                        delay_io.write_raw_workbook(filename, self.data, self.unique_minute_map, info)
+                    elif filename.endswith('.csv'):
+                        delay_io.write_raw_csv(filename, self.data, self.unique_minute_map, info)
+
+                    # The file now holds every minute: restart the journal from it
+                    self.saved_version = self.session_version()
+                    if self.journal is not None:
+                        self.journal.clear()
+                        self.record_study_info()
+                        self.journal.record("saved", os.path.abspath(filename))
+                    self.store_in_repository(self.cached_results())
                 messagebox.showinfo("Success", f"Data saved successfully to {filename}")
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error saving file: {str(e)}")
 
+    def open_data(self):
+        """Reopen a file written by Save Data as the current session."""
+        if self.data and not messagebox.askyesno(
+                "Open Data", "Opening a file replaces the current session. Continue?"):
+            return
+        filename = filedialog.askopenfilename(
+            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("Parquet files", "*.parquet"),
+                       ("Feather files", "*.feather"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+
+        import delay_io
+
+        try:
+            data, unique_minute_map, info = delay_io.load_raw(filename)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error opening file: {str(e)}")
+            return
+
+        self.stop_clock()
+        self.keyboard.flush()
+        # Refill the existing containers in bulk; the table and the views hold references to them
+        self.data.clear()
+        self.data.extend_store(data)
+        self.unique_store.load(unique_minute_map)
+        self.current_unique_stopped = None
+        self.current_unique_notstopped = None
+
+        self.date_var.set(info["date"])
+        self.intersection_var.set(info["intersection"])
+        self.weather_var.set(info["weather"])
+        hour, minute, second = (info["start_time"].split(":") + ["00", "00", "00"])[:3]
+        self.start_hour_var.set(hour)
+        self.start_minute_var.set(minute)
+        self.start_second_var.set(second)
+        periods = self.data.periods()
+        self.num_periods_var.set(str(max([DEFAULT_PERIODS] + periods)))
+
+        # The journal now describes the opened session, so a crash resumes from it
+        if self.sync is not None:
+            self.sync.send("clear")
+        if self.journal is not None:
+            self.journal.clear()
+            self.record_study_info()
+        for row in self.data:
+            self.journal_event("entry", row[0], row[1], row[2], list(row[3:7]), row[7], list(row[8:12]), row[12])
+        self.saved_version = self.session_version()
+
+        # The virtual table only renders the visible rows, so this is one batched update
+        self.table.clear()
+        self.table.refresh()
+        self.reset_counts()
+        last = len(self.data) - 1
+        self.resume_after(self.data.row(last)[:3] if last >= 0 else None)
+        messagebox.showinfo("Open Data", f"Opened {len(self.data)} minute rows from {os.path.basename(filename)}")
+
     def clear_data(self):
         if messagebox.askyesno("Clear Data", "Are you sure you want to clear all data?"):
+            self.stop_clock()
             self.data.clear()
-            for row in self.tree.get_children():
-                self.tree.delete(row)
+            self.table.clear()
             self.period_var.set("1 (0-15 min)")
             self.minute_var.set("1")
             self.reset_counts()
-            self.approach_volume.clear()
+            self.unique_store.clear()
             self.approach_volume_var.set("0")
-            self.unique_map.clear()
             self.current_unique_stopped = None
             self.current_unique_notstopped = None
+            # The aggregation server drops this observer's rows as well
+            if self.sync is not None:
+                self.sync.send("clear")
+            if self.journal is not None:
+                self.journal.clear()
+                self.record_study_info()
 
     def generate_form2(self):
         """Generate Form 2 with aggregated 15-minute period data."""
@@ -893,13 +1247,81 @@ class DelayStudyApp:
             return
         
         # Create Form 2 window
+        results = self.cached_results()
         form2_window = Form2Window(self.root, self.data, self.date_var.get(), 
                                   self.intersection_var.get(), self.weather_var.get(),
-                                  self.approach_volume, self.unique_map)
+                                  self.approach_volume, self.unique_map, results,
+                                  start_time=self.start_time_text(), unique_minute_map=self.unique_minute_map)
+
+
+def form2_results_text(delay_results):
+    """Text shown under Calculated Results on Form 2."""
+    import delay_engine
+
+    overall = delay_results.overall
+    total_stopped_all_intervals = overall["Total Stopped"]
+    total_vehicles = overall["Total Vehicles"]
+    total_stopped_unique = overall["Total Stopped Unique"]
+    
+    total_delay_seconds = overall["Total Delay (sec)"]
+    total_delay_hours = total_delay_seconds / 3600
+    avg_delay_stopped = overall["Avg Delay per Stopped (sec)"]
+    avg_delay_approach = overall["Avg Delay per Approach (sec)"]
+    percent_stopped = overall["Percent Stopped"]
+    num_periods = delay_results.arrays.num_periods
+    
+    # Format results
+    results = f"""FORM 2 CALCULATED RESULTS
+{'='*50}
+
+Total Delay: {total_delay_seconds} vehicle-seconds
+Total Delay: {total_delay_hours:.2f} vehicle-hours
+Average Delay per Stopped Vehicle: {avg_delay_stopped:.2f} vehicle-seconds/vehicle
+Average Delay per Approach Vehicle: {avg_delay_approach:.2f} vehicle-seconds/vehicle
+Percent of Vehicles Stopped: {percent_stopped:.2f}%
+
+STUDY SUMMARY
+{'='*50}
+Total Vehicles Observed: {total_vehicles}
+Total Vehicles Stopped (all intervals): {total_stopped_all_intervals}
+Total Vehicles Stopped (unique): {total_stopped_unique}
+Total Vehicles Not Stopped: {max(total_vehicles - total_stopped_unique, 0)}
+Study Duration: {num_periods * 15} minutes ({num_periods} x 15-minute periods)
+Sampling Interval: 15 seconds
+
+PERIOD BREAKDOWN
+{'='*50}"""
+    
+    # Add period-by-period breakdown
+    for period, data in delay_results.period_totals.items():
+        stopped_all_intervals = data["Total Stopped"]
+        stopped_unique = data["Total Stopped Unique"]
+        total = data["Total Vehicles"]
+        period_delay = data["Total Delay (sec)"]
+        period_avg_delay = data["Avg Delay per Approach (sec)"]
+        
+        results += f"""
+Period {period} ({delay_engine.period_time_range(period)}):
+  Total Vehicles: {total}
+  Stopped (all intervals): {stopped_all_intervals}
+  Stopped (unique): {stopped_unique}
+  Not Stopped: {max(total - stopped_unique, 0)}
+  Total Delay: {period_delay} vehicle-seconds
+  Average Delay: {period_avg_delay:.2f} seconds/vehicle"""
+    
+    return results
+
 
 class Form2Window:
-    def __init__(self, parent, data, date, intersection, weather, approach_volume_map, unique_map):
+    def __init__(self, parent, data, date, intersection, weather, approach_volume_map, unique_map, results,
+                 start_time="", unique_minute_map=None):
         self.data = data
+        self.results = results
+        # Whole-study results; self.results may be narrowed to the peak hour
+        self.study_results = results
+        self.start_time = start_time
+        self.unique_minute_map = unique_minute_map if unique_minute_map is not None else {}
+        self.peak = None
         self.date = date
         self.intersection = intersection
         self.weather = weather
@@ -958,6 +1380,24 @@ class Form2Window:
         ttk.Entry(info_frame, textvariable=self.end_hour_var, width=3).grid(row=3, column=5, padx=2, pady=2, sticky="w")
         ttk.Label(info_frame, text=":").grid(row=3, column=6, padx=0, pady=2)
         ttk.Entry(info_frame, textvariable=self.end_minute_var, width=3).grid(row=3, column=7, padx=2, pady=2, sticky="w")
+
+        # Peak hour search over the session's minute totals
+        peak_frame = ttk.Frame(info_frame)
+        peak_frame.grid(row=3, column=8, columnspan=4, padx=10, pady=2, sticky="w")
+        self.peak_by_var = tk.StringVar(value="Volume")
+        self.peak_alignment_var = tk.StringVar(value="15-minute")
+        self.peak_only_var = tk.BooleanVar(value=False)
+        self.peak_status_var = tk.StringVar()
+        ttk.Label(peak_frame, text="Maximize:").pack(side="left")
+        ttk.Combobox(peak_frame, textvariable=self.peak_by_var, values=["Volume", "Total Delay"],
+                     width=11, state="readonly").pack(side="left", padx=2)
+        ttk.Combobox(peak_frame, textvariable=self.peak_alignment_var, values=["15-minute", "Minute"],
+                     width=9, state="readonly").pack(side="left", padx=2)
+        ttk.Button(peak_frame, text="Find Peak Hour", command=self.find_peak_hour).pack(side="left", padx=2)
+        ttk.Checkbutton(peak_frame, text="Peak hour rows only", variable=self.peak_only_var,
+                        command=self.apply_peak_filter).pack(side="left", padx=2)
+        ttk.Label(info_frame, textvariable=self.peak_status_var).grid(row=4, column=8, columnspan=4, padx=10,
+                                                                      sticky="w")
         
         # Observers
         ttk.Label(info_frame, text="Delay Observer:").grid(row=4, column=0, padx=5, pady=2, sticky="e")
@@ -1020,6 +1460,9 @@ class Form2Window:
         
         # Calculate and display results
         self.calculate_form2_results()
+
+        # Pre-fill the peak hour fields
+        self.find_peak_hour()
         
         # Action buttons
         button_frame = ttk.Frame(self.window)
@@ -1032,132 +1475,75 @@ class Form2Window:
 
     def populate_form2_data(self):
         """Populate Form 2 table with aggregated 15-minute period data."""
-        # Aggregate data by period and direction
-        period_data = {}
-        
-        for row in self.data:
-            period = row[0]  # Period number
-            direction = row[2]  # Direction
-            total_stopped = row[7]  # Total stopped
-            total_notstopped = row[12]  # Total not stopped
-            
-            if period not in period_data:
-                period_data[period] = {}
-            if direction not in period_data[period]:
-                period_data[period][direction] = {"stopped": 0, "notstopped": 0}
-            
-            period_data[period][direction]["stopped"] += total_stopped
-            period_data[period][direction]["notstopped"] += total_notstopped
-        
-        # Populate treeview
-        for period in sorted(period_data.keys()):
-            time_range = f"{15*(period-1):02d}:00-{15*period:02d}:00"
-            for direction in ["North", "South", "East", "West"]:
-                if direction in period_data[period]:
-                    stopped = period_data[period][direction]["stopped"]
-                    notstopped = period_data[period][direction]["notstopped"]
-                    total = stopped + notstopped
-                    u = self.unique_map.get((period, direction), {"stopped": 0, "notstopped": 0})
-                    observed_st = u["stopped"]
-                    observed_ns = u["notstopped"]
-                    observed = observed_st + observed_ns
-                    
-                    self.form2_tree.insert("", "end", values=(
-                        period, time_range, direction, stopped, notstopped, total, observed_st, observed_ns, observed
-                    ))
+        for values in self.results.form2:
+            self.form2_tree.insert("", "end", values=values)
+
+    def find_peak_hour(self):
+        """Search the session for its peak hour and fill in the Peak Hour fields."""
+        import delay_engine
+        import delay_io
+
+        by = "delay" if self.peak_by_var.get() == "Total Delay" else "volume"
+        aligned = self.peak_alignment_var.get() == "15-minute"
+        self.peak = delay_engine.find_peak_hour(self.study_results.arrays, by=by, aligned=aligned)
+
+        # actual_time counts minutes from the study start for period 1
+        begin_time = delay_io.actual_time(self.start_time, 1, self.peak.start + 1)
+        end_time = delay_io.actual_time(self.start_time, 1, self.peak.end + 1)
+        begin, end = begin_time.split(":"), end_time.split(":")
+        self.begin_hour_var.set(begin[0])
+        self.begin_minute_var.set(begin[1])
+        self.end_hour_var.set(end[0])
+        self.end_minute_var.set(end[1])
+        unit = "vehicles" if by == "volume" else "vehicle-seconds"
+        # The hour fields hold clock time only; the day of a multi-day count goes in the status
+        self.peak_status_var.set(f"Study minutes {self.peak.start}-{self.peak.end} "
+                                 f"({begin_time[:5]}{begin_time[8:]} - {end_time[:5]}{end_time[8:]}): "
+                                 f"{self.peak.value} {unit}")
+        if self.peak_only_var.get():
+            self.apply_peak_filter()
+
+    def apply_peak_filter(self):
+        """Feed the table and results from the peak hour rows only, or from the whole study."""
+        import delay_engine
+
+        if self.peak_only_var.get() and self.peak is not None:
+            store, unique_minute_map = delay_engine.window_session(self.data, self.unique_minute_map,
+                                                                   self.peak.start, self.peak.end)
+            self.results = delay_engine.calculate(store, unique_minute_map, self.study_results.arrays.num_periods)
+        else:
+            self.results = self.study_results
+
+        self.form2_tree.delete(*self.form2_tree.get_children())
+        self.populate_form2_data()
+        self.results_text.config(state="normal")
+        self.results_text.delete("1.0", "end")
+        self.calculate_form2_results()
 
     def calculate_form2_results(self):
         """Calculate and display Form 2 results."""
-        # Calculate total stopped vehicles (sum of all 15-second interval counts) across all periods and directions
-        total_stopped_all_intervals = 0
-        for row in self.data:
-            # Sum all stopped counts: stopped_0 + stopped_15 + stopped_30 + stopped_45
-            total_stopped_all_intervals += sum(row[3:7])  # indices 3-6 are stopped counts
-        
-        # Calculate total unique vehicles (approach volume) across all periods and directions
-        total_vehicles = 0
-        total_stopped_unique = 0
-        for period in range(1, 5):
-            for direction in ["North", "South", "East", "West"]:
-                u = self.unique_map.get((period, direction), {"stopped": 0, "notstopped": 0})
-                total_vehicles += (u["stopped"] + u["notstopped"])
-                total_stopped_unique += u["stopped"]
-        
-        # Calculate metrics
-        # Total Delay = Total Number Stopped (not unique) * 15 seconds
-        total_delay_seconds = total_stopped_all_intervals * 15
-        total_delay_hours = total_delay_seconds / 3600
-        # Average Delay per Stopped Vehicle = Total Delay / Number Stopped (Unique)
-        avg_delay_stopped = total_delay_seconds / total_stopped_unique if total_stopped_unique > 0 else 0
-        # Average Delay per Approach Vehicle = Total Delay / Total Approach Volume
-        avg_delay_approach = total_delay_seconds / total_vehicles if total_vehicles > 0 else 0
-        # Percent of Vehicles Stopped = Number Stopped (Unique) / Approach Volume
-        percent_stopped = (total_stopped_unique / total_vehicles * 100) if total_vehicles > 0 else 0
-        
-        # Format results
-        results = f"""FORM 2 CALCULATED RESULTS
-{'='*50}
-
-Total Delay: {total_delay_seconds} vehicle-seconds
-Total Delay: {total_delay_hours:.2f} vehicle-hours
-Average Delay per Stopped Vehicle: {avg_delay_stopped:.2f} vehicle-seconds/vehicle
-Average Delay per Approach Vehicle: {avg_delay_approach:.2f} vehicle-seconds/vehicle
-Percent of Vehicles Stopped: {percent_stopped:.2f}%
-
-STUDY SUMMARY
-{'='*50}
-Total Vehicles Observed: {total_vehicles}
-Total Vehicles Stopped (all intervals): {total_stopped_all_intervals}
-Total Vehicles Stopped (unique): {total_stopped_unique}
-Total Vehicles Not Stopped: {max(total_vehicles - total_stopped_unique, 0)}
-Study Duration: 60 minutes (4 x 15-minute periods)
-Sampling Interval: 15 seconds
-
-PERIOD BREAKDOWN
-{'='*50}"""
-        
-        # Add period-by-period breakdown
-        period_data = {}
-        for row in self.data:
-            period = row[0]
-            if period not in period_data:
-                period_data[period] = {"stopped_all_intervals": 0, "stopped_unique": 0}
-            # Sum all stopped counts: stopped_0 + stopped_15 + stopped_30 + stopped_45
-            period_data[period]["stopped_all_intervals"] += sum(row[3:7])  # indices 3-6 are stopped counts
-        
-        # Calculate unique stopped totals per period
-        for period in range(1, 5):
-            if period not in period_data:
-                period_data[period] = {"stopped_all_intervals": 0, "stopped_unique": 0}
-            for direction in ["North", "South", "East", "West"]:
-                u = self.unique_map.get((period, direction), {"stopped": 0, "notstopped": 0})
-                period_data[period]["stopped_unique"] += u["stopped"]
-        
-        for period in sorted(period_data.keys()):
-            stopped_all_intervals = period_data[period]["stopped_all_intervals"]
-            stopped_unique = period_data[period]["stopped_unique"]
-            # unique total approach volume for this period across all directions
-            total = 0
-            for direction in ["North", "South", "East", "West"]:
-                u = self.unique_map.get((period, direction), {"stopped": 0, "notstopped": 0})
-                total += (u["stopped"] + u["notstopped"])
-            period_delay = stopped_all_intervals * 15
-            period_avg_delay = period_delay / total if total > 0 else 0
-            
-            results += f"""
-Period {period} ({15*(period-1):02d}:00-{15*period:02d}:00):
-  Total Vehicles: {total}
-  Stopped (all intervals): {stopped_all_intervals}
-  Stopped (unique): {stopped_unique}
-  Not Stopped: {max(total - stopped_unique, 0)}
-  Total Delay: {period_delay} vehicle-seconds
-  Average Delay: {period_avg_delay:.2f} seconds/vehicle"""
-        
-        self.results_text.insert("1.0", results)
+        self.results_text.insert("1.0", form2_results_text(self.results))
         self.results_text.config(state="disabled")
 
+    def form2_info(self):
+        """[label, value] pairs written above the Form 2 table."""
+        return [
+            ["Date:", self.date],
+            ["Location:", self.location_var.get()],
+            ["Approach:", self.approach_var.get()],
+            ["Movement(s):", self.movement_var.get()],
+            ["Lanes:", self.lanes_var.get()],
+            ["Weather:", self.weather],
+            ["Peak Hour:", f"{self.begin_hour_var.get()}:{self.begin_minute_var.get()} - {self.end_hour_var.get()}:{self.end_minute_var.get()}"],
+            ["Delay Observer:", self.delay_observer_var.get()],
+            ["Count Observer:", self.count_observer_var.get()],
+            ["Recorder:", self.recorder_var.get()]
+        ]
+
     def export_form2(self):
         """Export Form 2 to Excel file."""
+        import delay_io
+
         try:
             filename = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
@@ -1165,42 +1551,8 @@ Period {period} ({15*(period-1):02d}:00-{15*period:02d}:00):
                 initialfile="Form2_Intersection_Delay_Study.xlsx"
             )
             if filename:
-                # Prepare Form 2 data
-                form2_data = []
-                for item in self.form2_tree.get_children():
-                    values = self.form2_tree.item(item)["values"]
-                    form2_data.append(values)
-                
-                # Create DataFrame
-                columns = ["Interval", "Time Range", "Direction", "Total Stopped", "Total Not Stopped", "Total Volume", "Observed Stopped (unique)", "Observed Not Stopped (unique)", "Observed Volume (unique)"]
-                df = pd.DataFrame(form2_data, columns=columns)
-                
-                # Write to Excel
-                with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                    # Study information
-                    info_df = pd.DataFrame([
-                        ["Form 2: Intersection Delay Study"],
-                        ["Date:", self.date],
-                        ["Location:", self.location_var.get()],
-                        ["Approach:", self.approach_var.get()],
-                        ["Movement(s):", self.movement_var.get()],
-                        ["Lanes:", self.lanes_var.get()],
-                        ["Weather:", self.weather],
-                        ["Peak Hour:", f"{self.begin_hour_var.get()}:{self.begin_minute_var.get()} - {self.end_hour_var.get()}:{self.end_minute_var.get()}"],
-                        ["Delay Observer:", self.delay_observer_var.get()],
-                        ["Count Observer:", self.count_observer_var.get()],
-                        ["Recorder:", self.recorder_var.get()],
-                        [""]
-                    ])
-                    info_df.to_excel(writer, sheet_name='Form2', index=False, header=False)
-                    
-                    # Form 2 data
-                    df.to_excel(writer, sheet_name='Form2', index=False, startrow=len(info_df))
-                    
-                    # Auto-adjust columns
-                    worksheet = writer.sheets['Form2']
-                    for idx, col in enumerate(df.columns):
-                        worksheet.column_dimensions[chr(65 + idx)].width = 20
+                # Rows come from the results' Form 2 table, not from the Treeview
+                delay_io.write_form2_workbook(filename, self.results.form2, self.form2_info())
                 
                 messagebox.showinfo("Success", f"Form 2 exported to {filename}")
                 
@@ -1208,10 +1560,28 @@ Period {period} ({15*(period-1):02d}:00-{15*period:02d}:00):
             messagebox.showerror("Error", f"Error exporting Form 2: {str(e)}")
 
 if __name__ == "__main__":
+    # --startup-timing or DELAY_STARTUP_TIMING=1 prints where the cold start goes
+    startup_timing = "--startup-timing" in sys.argv[1:] or os.environ.get("DELAY_STARTUP_TIMING") == "1"
+    t_root = time.perf_counter()
     root = tk.Tk()
     try:
         ttk.Style().theme_use("clam")
     except tk.TclError:
         pass
+    t_widgets = time.perf_counter()
     app = DelayStudyApp(root)
+    t_built = time.perf_counter()
+    # Map and draw the window before any background work starts
+    root.update()
+    t_painted = time.perf_counter()
+    if startup_timing:
+        print_startup_timing([
+            ("module imports", _IMPORT_END - _IMPORT_START),
+            ("Tk root and theme", t_widgets - t_root),
+            ("widget construction", t_built - t_widgets),
+            ("first paint", t_painted - t_built),
+            ("total to first paint", t_painted - _IMPORT_START),
+        ])
+    if os.environ.get("DELAY_PRELOAD", "1") != "0":
+        preload_modules(report=startup_timing)
     root.mainloop()
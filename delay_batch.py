@@ -0,0 +1,197 @@
+"""Batch-process saved delay studies without the Tk window.
+
+Finds every *_DATA.xlsx under a directory tree (the layout written by
+DelayStudyApp.save_data), applies the Calculate Results formulas and writes the
+matching *_RESULTS.xlsx and Form 2 workbooks next to each input. Every study
+is checked by delay_validate first; --report collects the issues of the whole
+archive in one CSV.
+
+    python delay_batch.py "Oct 27" SEPTEMBER_22 --jobs 4 --overwrite
+    python delay_batch.py archive --report issues.csv --strict
+
+Existing results and Form 2 workbooks are left alone (the study fails)
+unless --overwrite is given.
+"""
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import delay_engine
+import delay_io
+import delay_validate
+
+DATA_SUFFIX = "_DATA.xlsx"
+
+
+def find_data_workbooks(roots):
+    """All *_DATA.xlsx files under the given directories (or files), sorted."""
+    found = []
+    for root in roots:
+        root = Path(root)
+        if root.is_file():
+            candidates = [root]
+        else:
+            candidates = root.rglob("*" + DATA_SUFFIX)
+        # Skip Excel lock files (~$AM_DATA.xlsx)
+        found.extend(p for p in candidates if p.name.endswith(DATA_SUFFIX) and not p.name.startswith("~$"))
+    return sorted(set(found))
+
+
+def output_paths(data_path, form2_suffix):
+    """(results_path, form2_path) for a *_DATA.xlsx input."""
+    data_path = Path(data_path)
+    prefix = data_path.name[:-len(DATA_SUFFIX)]
+    return (data_path.with_name(f"{prefix}_RESULTS.xlsx"),
+            data_path.with_name(f"{prefix}{form2_suffix}.xlsx"))
+
+
+def peak_hour_label(start_time, num_periods):
+    """"HH:MM - HH:MM" covering the study, from a "HH:MM:SS" start time.
+
+    The end of a multi-day count carries its day, e.g. "07:30 - 07:30 +1d".
+    """
+    try:
+        hour, minute = (int(part) for part in start_time.split(":")[:2])
+    except ValueError:
+        return ""
+    day, end = divmod(hour * 60 + minute + num_periods * delay_engine.MINUTES_PER_PERIOD, 24 * 60)
+    return f"{hour:02d}:{minute:02d} - {end // 60:02d}:{end % 60:02d}{delay_io.day_suffix(day)}"
+
+
+def process_workbook(data_path, form2_suffix="_TWO", repository=None, intervals=False, strict=False,
+                     overwrite=False):
+    """Validate, then compute and write results for one raw-data workbook.
+
+    With repository (a database path) the study is also stored in the
+    delay_repository; with intervals the results workbook gets the bootstrap
+    confidence interval sheet; with strict a study with validation errors is
+    skipped and nothing is written. Without overwrite, existing output
+    workbooks raise FileExistsError. Returns a short summary dict; runs in a
+    worker process.
+    """
+    results_path, form2_path = output_paths(data_path, form2_suffix)
+    existing = [path.name for path in (results_path, form2_path) if path.exists()]
+    if existing and not overwrite:
+        raise FileExistsError(f"{' and '.join(existing)} already exist{'s' if len(existing) == 1 else ''}; "
+                              "use --overwrite to replace them")
+
+    data, unique_minute_map, info = delay_io.load_raw_workbook(data_path)
+    report = delay_validate.validate(data, unique_minute_map)
+    summary = {"input": str(data_path), "rows": len(data), "validation": report.summary(),
+               "issues": report.rows(), "skipped": strict and bool(report.errors)}
+    if summary["skipped"]:
+        return summary
+    arrays = delay_engine.build_session_arrays(data, unique_minute_map)
+    results = delay_engine.compute_results(arrays)
+
+    delay_io.write_results_workbook(results_path, results, info["date"], info["intersection"], info["weather"],
+                                    delay_engine.bootstrap_intervals(results) if intervals else None)
+    delay_io.write_form2_workbook(form2_path, results.form2, [
+        ["Date:", info["date"]],
+        ["Location:", info["intersection"]],
+        ["Approach:", "All Approaches"],
+        ["Movement(s):", "All Movements"],
+        ["Lanes:", "All Lanes"],
+        ["Weather:", info["weather"]],
+        ["Peak Hour:", peak_hour_label(info["start_time"], arrays.num_periods)],
+        ["Delay Observer:", ""],
+        ["Count Observer:", ""],
+        ["Recorder:", ""]
+    ])
+    if repository:
+        import delay_repository
+
+        repo = delay_repository.StudyRepository(repository)
+        try:
+            repo.save_session(info, data, unique_minute_map, results)
+        finally:
+            repo.close()
+    summary.update({
+        "results": str(results_path),
+        "form2": str(form2_path),
+        "avg_delay_approach": results.overall["Avg Delay per Approach (sec)"],
+    })
+    return summary
+
+
+def run(paths, jobs=None, form2_suffix="_TWO", repository=None, intervals=False, strict=False, overwrite=False):
+    """Process paths in a process pool; yields (path, summary, error) as they finish."""
+    args = (form2_suffix, repository, intervals, strict, overwrite)
+    if jobs == 1:
+        for path in paths:
+            try:
+                yield path, process_workbook(path, *args), None
+            except Exception as e:
+                yield path, None, e
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(process_workbook, path, *args): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                yield path, future.result(), None
+            except Exception as e:
+                yield path, None, e
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute results for every *_DATA.xlsx under the given directories.")
+    parser.add_argument("roots", nargs="*", default=["."], help="directories or workbooks to process (default: .)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument("--form2-suffix", default="_TWO",
+                        help="suffix for Form 2 workbooks, e.g. _TWO or _FORM_2 (default: _TWO)")
+    parser.add_argument("--repository", metavar="DB",
+                        help="also store every study in this SQLite study repository")
+    parser.add_argument("--intervals", action="store_true",
+                        help="add bootstrap confidence intervals to the results workbooks")
+    parser.add_argument("--report", metavar="CSV",
+                        help="write the validation issues of every workbook to this CSV file")
+    parser.add_argument("--strict", action="store_true",
+                        help="skip (and count as failed) workbooks with validation errors")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="replace existing results and Form 2 workbooks")
+    parser.add_argument("--dry-run", action="store_true", help="list the workbooks that would be processed")
+    args = parser.parse_args(argv)
+
+    paths = find_data_workbooks(args.roots)
+    if not paths:
+        print("No *_DATA.xlsx workbooks found.", file=sys.stderr)
+        return 1
+    if args.dry_run:
+        for path in paths:
+            print(path)
+        return 0
+
+    failures = 0
+    issues = []
+    for path, summary, error in run(paths, max(1, args.jobs), args.form2_suffix, args.repository,
+                                    args.intervals, args.strict, args.overwrite):
+        if error is not None:
+            failures += 1
+            print(f"FAILED {path}: {error}", file=sys.stderr)
+        else:
+            issues.extend([str(path)] + row for row in summary["issues"])
+            if summary["skipped"]:
+                failures += 1
+                print(f"SKIPPED {path}: {summary['validation']}", file=sys.stderr)
+                continue
+            print(f"{path}: {summary['rows']} rows, "
+                  f"avg delay {summary['avg_delay_approach']:.2f} s/veh -> "
+                  f"{Path(summary['results']).name}, {Path(summary['form2']).name}; {summary['validation']}")
+    print(f"Processed {len(paths) - failures} of {len(paths)} workbooks.")
+    if args.report:
+        issues.sort(key=lambda row: row[0])
+        with open(args.report, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Workbook"] + delay_validate.REPORT_COLUMNS)
+            writer.writerows(issues)
+        print(f"Wrote {len(issues)} validation issues to {args.report}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
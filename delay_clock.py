@@ -0,0 +1,62 @@
+"""Drift-free 15-second sampling clock driven by Tk's after().
+
+Sample k is due at start + k * interval on the monotonic clock. Every
+after() delay is recomputed from that schedule, so timer jitter and busy
+callbacks never accumulate. When the Tk loop was blocked (an export, a
+dialog) past one or more due times, the missed samples are delivered in
+order as soon as it runs again, each with its lateness.
+"""
+import math
+import time
+
+INTERVAL_SECONDS = 15
+INTERVALS_PER_MINUTE = 4
+
+
+class SamplingClock:
+    """Calls on_tick(index, lateness_seconds) at every sampling instant.
+
+    index 0 is the start; index % INTERVALS_PER_MINUTE is the interval
+    column being sampled, and index > 0 with interval 0 is a minute boundary.
+    """
+
+    def __init__(self, root, on_tick, interval=INTERVAL_SECONDS, clock=time.monotonic):
+        self.root = root
+        self.on_tick = on_tick
+        self.interval = interval
+        self.clock = clock
+        self.start_time = None
+        self.index = 0
+        self._after_id = None
+
+    @property
+    def running(self):
+        return self.start_time is not None
+
+    def start(self):
+        self.stop()
+        self.start_time = self.clock()
+        self.index = 0
+        self._fire()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.start_time = None
+
+    def due_time(self, index):
+        return self.start_time + index * self.interval
+
+    def _fire(self):
+        self._after_id = None
+        now = self.clock()
+        # Every sample due by now, including any missed while Tk was busy
+        last_due = int((now - self.start_time) // self.interval)
+        while self.running and self.index <= last_due:
+            index = self.index
+            self.index += 1
+            self.on_tick(index, max(0.0, now - self.due_time(index)))
+        if self.running:
+            delay_ms = math.ceil((self.due_time(self.index) - self.clock()) * 1000)
+            self._after_id = self.root.after(max(delay_ms, 1), self._fire)
@@ -0,0 +1,440 @@
+"""Headless delay study calculations (no Tk).
+
+The minute rows and the per-minute unique splits are packed into dense arrays
+shaped (period, direction, minute, interval) and every result table is derived
+from one grouped reduction over those arrays.
+
+Formulas (see "Intersection Delay Study Formulas.txt"):
+    Total Delay = Total Number Stopped (not unique) * 15
+    Avg Delay per Stopped Vehicle = Total Delay / Number Stopped (unique)
+    Avg Delay per Approach Vehicle = Total Delay / Total Approach Volume
+    Percent of Vehicles Stopped = Number Stopped (unique) / Approach Volume
+"""
+import numpy as np
+
+from delay_store import DIRECTIONS, MINUTES_PER_PERIOD, NOTSTOPPED_FIELDS, STOPPED_FIELDS
+
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTIONS)}
+NUM_PERIODS = 4
+INTERVALS_PER_MINUTE = 4
+SECONDS_PER_INTERVAL = 15
+
+# Column order of the per-(period, direction) feature matrix
+_STOPPED_ALL = 0
+_UNIQUE_STOPPED = 1
+_UNIQUE_NOTSTOPPED = 2
+
+
+class SessionArrays:
+    """Dense array view of a session.
+
+    stopped / notstopped: (period, direction, minute, interval) snapshot counts
+    unique: (period, direction, minute, 2) unique stopped / not stopped per minute
+    row_unique: (period, direction, 2) unique totals stored on the minute rows
+    rows: (period, direction) number of minute rows recorded
+    minute_rows: (period, direction, minute) number of minute rows recorded
+    """
+
+    def __init__(self, stopped, notstopped, unique, row_unique, rows, minute_rows=None):
+        self.stopped = stopped
+        self.notstopped = notstopped
+        self.unique = unique
+        self.row_unique = row_unique
+        self.rows = rows
+        self.minute_rows = minute_rows if minute_rows is not None else np.zeros(unique.shape[:3], dtype=np.int64)
+
+    @property
+    def num_periods(self):
+        return self.rows.shape[0]
+
+
+def build_session_arrays(store, unique_minute_map, num_periods=NUM_PERIODS):
+    """Pack an ObservationStore and unique_minute_map into a SessionArrays.
+
+    Rows whose direction is not one of DIRECTIONS are ignored, matching the
+    per-direction loops they replace, as are rows with a period or minute
+    below 1 (delay_validate reports both). A delay_store.UniqueMinuteArray is
+    copied as one dense block; a plain dict is scattered key by key.
+    """
+    # ObservationStore gives the four compass directions codes 0-3
+    d = store.column("direction")
+    p = store.column("period")
+    m = store.column("minute")
+    keep = (d < len(DIRECTIONS)) & (p >= 1) & (m >= 1)
+    d = d[keep].astype(np.intp)
+    p = p[keep].astype(np.intp) - 1
+    m = m[keep].astype(np.intp) - 1
+    dense = getattr(unique_minute_map, "dense", None)
+    if dense is not None:
+        dense_values, _ = dense()
+        extra = dict(unique_minute_map.extra_items())
+        keys = [k for k in extra if k[1] in DIRECTION_CODES]
+    else:
+        dense_values = np.zeros((0, len(DIRECTIONS), MINUTES_PER_PERIOD, 2), dtype=np.int64)
+        keys = [k for k in unique_minute_map if k[1] in DIRECTION_CODES]
+
+    max_period = max([num_periods, int(p.max()) + 1 if len(p) else 0, len(dense_values)] + [k[0] for k in keys])
+    max_minute = max([MINUTES_PER_PERIOD, int(m.max()) + 1 if len(m) else 0] + [k[2] for k in keys])
+    shape = (max_period, len(DIRECTIONS), max_minute)
+
+    stopped = np.zeros(shape + (INTERVALS_PER_MINUTE,), dtype=np.int64)
+    notstopped = np.zeros(shape + (INTERVALS_PER_MINUTE,), dtype=np.int64)
+    unique = np.zeros(shape + (2,), dtype=np.int64)
+    row_unique = np.zeros(shape[:2] + (2,), dtype=np.int64)
+    row_count = np.zeros(shape[:2], dtype=np.int64)
+    minute_count = np.zeros(shape, dtype=np.int64)
+
+    if len(p):
+        # np.add.at accumulates duplicate (period, direction, minute) rows
+        np.add.at(stopped, (p, d, m), store.columns(STOPPED_FIELDS)[keep])
+        np.add.at(notstopped, (p, d, m), store.columns(NOTSTOPPED_FIELDS)[keep])
+        np.add.at(row_unique, (p, d), store.columns(("unique_stopped", "unique_notstopped"))[keep])
+        np.add.at(row_count, (p, d), 1)
+        np.add.at(minute_count, (p, d, m), 1)
+
+    unique[:len(dense_values), :, :MINUTES_PER_PERIOD] = dense_values
+    if keys:
+        idx = np.array([(k[0] - 1, DIRECTION_CODES[k[1]], k[2] - 1) for k in keys], dtype=np.int64)
+        if dense is not None:
+            vals = np.array([extra[k] for k in keys], dtype=np.int64)
+        else:
+            vals = np.array(
+                [(unique_minute_map[k].get("stopped", 0), unique_minute_map[k].get("notstopped", 0)) for k in keys],
+                dtype=np.int64,
+            )
+        unique[idx[:, 0], idx[:, 1], idx[:, 2]] = vals
+
+    return SessionArrays(stopped, notstopped, unique, row_unique, row_count, minute_count)
+
+
+def _metrics(features):
+    """Vectorized delay metrics over a (..., 3) feature array."""
+    stopped_all = features[..., _STOPPED_ALL]
+    unique_stopped = features[..., _UNIQUE_STOPPED]
+    vehicles = unique_stopped + features[..., _UNIQUE_NOTSTOPPED]
+    delay = stopped_all * SECONDS_PER_INTERVAL
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_stopped = np.where(unique_stopped > 0, delay / np.maximum(unique_stopped, 1), 0.0)
+        avg_approach = np.where(vehicles > 0, delay / np.maximum(vehicles, 1), 0.0)
+        percent = np.where(vehicles > 0, unique_stopped / np.maximum(vehicles, 1) * 100, 0.0)
+    return {
+        "Total Vehicles": vehicles,
+        "Total Stopped": stopped_all,
+        "Total Stopped Unique": unique_stopped,
+        "Total Delay (sec)": delay,
+        "Avg Delay per Stopped (sec)": avg_stopped,
+        "Avg Delay per Approach (sec)": avg_approach,
+        "Percent Stopped": percent,
+    }
+
+
+_INT_METRICS = ("Total Vehicles", "Total Stopped", "Total Stopped Unique", "Total Delay (sec)")
+
+
+def _record(metrics, index):
+    """Pull one result row out of vectorized metrics as plain Python numbers."""
+    return {
+        name: (int(values[index]) if name in _INT_METRICS else float(values[index]))
+        for name, values in metrics.items()
+    }
+
+
+class DelayResults:
+    """All result tables for a session.
+
+    by_period_direction: {period: {direction: metrics}}
+    by_period: {period: metrics} (all directions combined)
+    by_direction: {direction: metrics} (all periods combined)
+    overall: metrics for the whole study
+    period_totals: {period: metrics} for every period, including empty ones
+    arrays: the SessionArrays the tables were computed from
+    form2: the Form 2 table (see form2_rows), computed on first use
+    """
+
+    def __init__(self, by_period_direction, by_period, by_direction, overall, period_totals, arrays):
+        self.by_period_direction = by_period_direction
+        self.by_period = by_period
+        self.by_direction = by_direction
+        self.overall = overall
+        self.period_totals = period_totals
+        self.arrays = arrays
+        self._form2 = None
+
+    @property
+    def form2(self):
+        # One table shared by the Form 2 display, text and export
+        if self._form2 is None:
+            self._form2 = form2_rows(self.arrays)
+        return self._form2
+
+
+def compute_results(arrays):
+    """Compute every result table for a SessionArrays with one grouped reduction."""
+    # (period, direction, 3) feature matrix: raw stopped, unique stopped, unique not stopped
+    features = np.empty(arrays.rows.shape + (3,), dtype=np.int64)
+    features[..., _STOPPED_ALL] = arrays.stopped.sum(axis=(2, 3))
+    features[..., _UNIQUE_STOPPED:] = arrays.unique.sum(axis=2)
+
+    cell = _metrics(features)
+    period = _metrics(features.sum(axis=1))
+    direction = _metrics(features.sum(axis=0))
+    overall = _metrics(features.sum(axis=(0, 1)))
+
+    # A table row is reported only when minute rows exist and approach volume is positive
+    has_cell = (arrays.rows > 0) & (cell["Total Vehicles"] > 0)
+    has_period = (arrays.rows.sum(axis=1) > 0) & (period["Total Vehicles"] > 0)
+    has_direction = (arrays.rows.sum(axis=0) > 0) & (direction["Total Vehicles"] > 0)
+
+    by_period_direction = {}
+    by_period = {}
+    period_totals = {}
+    for p in range(arrays.num_periods):
+        by_period_direction[p + 1] = {
+            name: _record(cell, (p, d)) for d, name in enumerate(DIRECTIONS) if has_cell[p, d]
+        }
+        if has_period[p]:
+            by_period[p + 1] = _record(period, p)
+        period_totals[p + 1] = _record(period, p)
+
+    by_direction = {name: _record(direction, d) for d, name in enumerate(DIRECTIONS) if has_direction[d]}
+
+    return DelayResults(by_period_direction, by_period, by_direction, _record(overall, ()), period_totals,
+                        arrays)
+
+
+def calculate(store, unique_minute_map, num_periods=NUM_PERIODS):
+    """Convenience wrapper: build the arrays and compute the results."""
+    return compute_results(build_session_arrays(store, unique_minute_map, num_periods))
+
+
+def form2_rows(arrays):
+    """Form 2 table rows: one per (period, direction) with recorded minutes.
+
+    Each row is (period, time_range, direction, total_stopped, total_notstopped,
+    total_volume, observed_stopped, observed_notstopped, observed_volume) where the
+    totals come from the minute rows and the observed columns from the unique splits.
+    """
+    observed = arrays.unique.sum(axis=2)
+    rows = []
+    for p, d in zip(*np.nonzero(arrays.rows > 0)):
+        period = int(p) + 1
+        stopped, notstopped = (int(v) for v in arrays.row_unique[p, d])
+        observed_st, observed_ns = (int(v) for v in observed[p, d])
+        rows.append((
+            period, period_time_range(period), DIRECTIONS[d],
+            stopped, notstopped, stopped + notstopped,
+            observed_st, observed_ns, observed_st + observed_ns
+        ))
+    return rows
+
+
+def period_time_range(period):
+    """Time from the study start used on Form 2, e.g. "15:00-30:00" for period 2.
+
+    Periods after the first hour read "H:MM:SS", e.g. "1:00:00-1:15:00", and
+    on to "24:00:00-24:15:00" on the second day of a multi-day count.
+    """
+    start, end = MINUTES_PER_PERIOD * (period - 1), MINUTES_PER_PERIOD * period
+    if end <= 60:
+        return f"{start:02d}:00-{end:02d}:00"
+    return f"{start // 60}:{start % 60:02d}:00-{end // 60}:{end % 60:02d}:00"
+
+
+# Quantities find_peak_hour can maximize
+PEAK_MEASURES = ("volume", "delay")
+
+
+class PeakHour:
+    """A study window [start, end) in minutes from the study start."""
+
+    def __init__(self, start, end, value, by):
+        self.start = start
+        self.end = end
+        self.value = value
+        self.by = by
+
+
+def minute_series(arrays, by="volume"):
+    """Per-minute totals over all directions; index i is minute i of the study.
+
+    "volume" is unique stopped + not stopped vehicles, "delay" the stopped
+    vehicle-seconds.
+    """
+    m = MINUTES_PER_PERIOD
+    if by == "volume":
+        return arrays.unique[:, :, :m].sum(axis=(1, 3)).reshape(-1)
+    if by == "delay":
+        return arrays.stopped[:, :, :m].sum(axis=(1, 3)).reshape(-1) * SECONDS_PER_INTERVAL
+    raise ValueError(f"Unknown peak measure {by!r}; expected one of {PEAK_MEASURES}")
+
+
+def find_peak_hour(arrays, by="volume", aligned=True, window=60):
+    """Window of window minutes with the largest total volume or delay.
+
+    Every candidate sum comes from one prefix-sum difference, so the search
+    is O(minutes) for any study length. aligned=True only starts windows on
+    15-minute period boundaries; otherwise any minute can start one. Studies
+    shorter than the window return the whole study. Ties go to the earliest
+    window.
+    """
+    series = minute_series(arrays, by)
+    n = len(series)
+    window = min(window, n)
+    prefix = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(series, out=prefix[1:])
+    sums = prefix[window:] - prefix[:n - window + 1]
+    step = MINUTES_PER_PERIOD if aligned else 1
+    start = int(np.argmax(sums[::step])) * step
+    return PeakHour(start, start + window, int(sums[start]), by)
+
+
+def window_session(store, unique_minute_map, start, end):
+    """The minute rows and unique splits in [start, end) minutes from the study start.
+
+    Returns (ObservationStore, unique_minute_map) for calculate().
+    """
+    offset = ((store.column("period").astype(np.int64) - 1) * MINUTES_PER_PERIOD
+              + store.column("minute") - 1)
+    rows = np.nonzero((offset >= start) & (offset < end))[0]
+    window_map = {
+        key: value for key, value in unique_minute_map.items()
+        if start <= (key[0] - 1) * MINUTES_PER_PERIOD + key[2] - 1 < end
+    }
+    return store.take(rows), window_map
+
+
+# Bootstrap defaults: replicates, two-sided confidence level and generator seed
+BOOTSTRAP_REPLICATES = 2000
+BOOTSTRAP_CONFIDENCE = 0.95
+BOOTSTRAP_SEED = 0
+
+# Replicates are drawn in chunks of at most this many (replicate, cell, minute) draws
+_BOOTSTRAP_CHUNK = 1 << 20
+
+
+class ConfidenceIntervals:
+    """Bootstrap (low, high) bounds laid out like the DelayResults tables.
+
+    by_period_direction: {period: {direction: {metric: (low, high)}}}
+    by_period: {period: {metric: (low, high)}}
+    by_direction: {direction: {metric: (low, high)}}
+    overall: {metric: (low, high)}
+    """
+
+    def __init__(self, by_period_direction, by_period, by_direction, overall, replicates, confidence, seed):
+        self.by_period_direction = by_period_direction
+        self.by_period = by_period
+        self.by_direction = by_direction
+        self.overall = overall
+        self.replicates = replicates
+        self.confidence = confidence
+        self.seed = seed
+
+
+def bootstrap_totals(arrays, replicates=BOOTSTRAP_REPLICATES, seed=BOOTSTRAP_SEED):
+    """(replicates, period, direction, 3) feature totals of resampled sessions.
+
+    Each replicate draws, for every (period, direction), as many minutes as
+    were recorded there, with replacement, and sums their features (raw
+    stopped, unique stopped, unique not stopped). All cells and a chunk of
+    replicates are drawn in one NumPy call.
+    """
+    num_periods, num_directions, num_minutes = arrays.unique.shape[:3]
+    cells = num_periods * num_directions
+    features = np.empty((num_periods, num_directions, num_minutes, 3), dtype=np.int64)
+    features[..., _STOPPED_ALL] = arrays.stopped.sum(axis=3)
+    features[..., _UNIQUE_STOPPED:] = arrays.unique
+    features = features.reshape(cells, num_minutes, 3)
+    # A minute counts if it has a row or a unique split, the minutes compute_results sums
+    recorded = (arrays.minute_rows.reshape(cells, num_minutes) > 0) | features.any(axis=2)
+    counts = recorded.sum(axis=1)
+    # Recorded minutes first, so a draw is an index below the cell's count
+    order = np.argsort(~recorded, axis=1, kind="stable")
+    compact = np.take_along_axis(features, order[..., None], axis=1)
+
+    rng = np.random.default_rng(seed)
+    totals = np.zeros((replicates, cells, 3), dtype=np.int64)
+    width = int(counts.max()) if cells else 0
+    if width:
+        # Flat feature columns plus a trailing zero that draws past a cell's count point at
+        columns = [np.append(compact[:, :width, k].reshape(-1), 0) for k in range(3)]
+        keep = np.arange(width) < counts[:, None]
+        base = np.where(keep, np.arange(cells)[:, None] * width, cells * width)
+        scale = np.where(keep, counts[:, None], 0)
+        chunk = max(1, _BOOTSTRAP_CHUNK // (cells * width))
+        for start in range(0, replicates, chunk):
+            size = min(chunk, replicates - start)
+            draws = (rng.random((size, cells, width)) * scale).astype(np.intp)
+            draws += base
+            for k, column in enumerate(columns):
+                totals[start:start + size, :, k] = column[draws].sum(axis=2)
+    return totals.reshape(replicates, num_periods, num_directions, 3)
+
+
+def bootstrap_intervals(results, replicates=BOOTSTRAP_REPLICATES, confidence=BOOTSTRAP_CONFIDENCE,
+                        seed=BOOTSTRAP_SEED):
+    """Percentile bootstrap intervals for every metric of every row of results.
+
+    Minutes are resampled within each (period, direction) (see
+    bootstrap_totals); the fixed seed makes the intervals reproducible.
+    """
+    totals = bootstrap_totals(results.arrays, replicates, seed)
+    tail = (1 - confidence) / 2
+
+    def bounds(features):
+        return {name: np.quantile(values, [tail, 1 - tail], axis=0) for name, values in _metrics(features).items()}
+
+    def interval(table, index):
+        return {name: (float(q[(0,) + index]), float(q[(1,) + index])) for name, q in table.items()}
+
+    cell = bounds(totals)
+    period = bounds(totals.sum(axis=2))
+    direction = bounds(totals.sum(axis=1))
+    overall = bounds(totals.sum(axis=(1, 2)))
+
+    by_period_direction = {
+        p: {name: interval(cell, (p - 1, DIRECTION_CODES[name])) for name in by_direction}
+        for p, by_direction in results.by_period_direction.items()
+    }
+    by_period = {p: interval(period, (p - 1,)) for p in results.by_period}
+    by_direction = {name: interval(direction, (DIRECTION_CODES[name],)) for name in results.by_direction}
+    return ConfidenceIntervals(by_period_direction, by_period, by_direction, interval(overall, ()),
+                               replicates, confidence, seed)
+
+
+def unique_from_snapshots(counts, same):
+    """Unique vehicles from 15-second snapshot counts and same-as-previous carry-overs.
+
+    counts is (..., 4) snapshot counts, same the (..., 3) vehicles at +15,
+    +30 and +45 sec already counted in the snapshot before. The first
+    snapshot counts in full; each later one adds only its new vehicles, never
+    fewer than zero. Works on one minute or a whole session at once.
+    """
+    counts = np.maximum(np.asarray(counts, dtype=np.int64), 0)
+    same = np.maximum(np.asarray(same, dtype=np.int64), 0)
+    return counts[..., 0] + np.maximum(counts[..., 1:] - same, 0).sum(axis=-1)
+
+
+def batch_unique(store, carryovers):
+    """Unique Assist for every minute with carry-overs, in one vectorized pass.
+
+    carryovers maps (period, direction, minute) to (same_stopped, same_notstopped),
+    three carry-overs each (see delay_io.load_carryovers). Minutes without a
+    minute row are skipped; when a minute was recorded twice the last row is
+    used, as in the table. Returns {(period, direction, minute): (unique_stopped,
+    unique_notstopped)}.
+    """
+    directions = store.direction_names()
+    index = {
+        (period, direction, minute): i
+        for i, (period, minute, direction) in enumerate(
+            zip(store.column("period").tolist(), store.column("minute").tolist(), directions))
+    }
+    keys = [key for key in carryovers if key in index]
+    if not keys:
+        return {}
+    rows = np.array([index[key] for key in keys], dtype=np.intp)
+    same = np.array([carryovers[key] for key in keys], dtype=np.int64)
+    unique_stopped = unique_from_snapshots(store.columns(STOPPED_FIELDS)[rows], same[:, 0])
+    unique_notstopped = unique_from_snapshots(store.columns(NOTSTOPPED_FIELDS)[rows], same[:, 1])
+    return dict(zip(keys, zip(unique_stopped.tolist(), unique_notstopped.tolist())))
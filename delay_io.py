@@ -0,0 +1,543 @@
+"""Reading and writing delay study workbooks (no Tk).
+
+The layouts match what DelayStudyApp.save_data, calculate_results and
+Form2Window.export_form2 write, so files produced here and in the app are
+interchangeable.
+
+Raw data can also be archived as Parquet or Feather (Arrow IPC) with the
+RAW_COLUMNS table and the study info as file-level metadata. These need the
+optional pyarrow package, which is imported only when such a file is used.
+"""
+import csv
+import json
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+
+from delay_store import DIRECTIONS, NOTSTOPPED_FIELDS, STOPPED_FIELDS, ObservationStore, normalize_direction
+
+RAW_TITLE = "Intersection Delay Study Raw Data"
+RESULTS_TITLE = "Intersection Delay Study Results"
+FORM2_TITLE = "Form 2: Intersection Delay Study"
+
+FORM2_COLUMNS = [
+    "Interval", "Time Range", "Direction", "Total Stopped", "Total Not Stopped", "Total Volume",
+    "Observed Stopped (unique)", "Observed Not Stopped (unique)", "Observed Volume (unique)"
+]
+
+INTERVAL_COLUMNS = ["Table", "Period", "Direction", "Metric", "Estimate", "Low", "High"]
+
+STOPPED_COLUMNS = ["Stopped 0-15s", "Stopped 15-30s", "Stopped 30-45s", "Stopped 45-60s"]
+NOTSTOPPED_COLUMNS = ["Not Stopped 0-15s", "Not Stopped 15-30s", "Not Stopped 30-45s", "Not Stopped 45-60s"]
+
+# Same-as-previous carry-overs read by Batch Unique Assist, one row per minute
+SAME_STOPPED_COLUMNS = ["Same Stopped +15s", "Same Stopped +30s", "Same Stopped +45s"]
+SAME_NOTSTOPPED_COLUMNS = ["Same Not Stopped +15s", "Same Not Stopped +30s", "Same Not Stopped +45s"]
+CARRYOVER_COLUMNS = ["Interval", "Minute", "Direction"] + SAME_STOPPED_COLUMNS + SAME_NOTSTOPPED_COLUMNS
+
+RAW_COLUMNS = (
+    ["Time", "Interval", "Minute", "Direction"]
+    + STOPPED_COLUMNS + ["Total Stopped", "Total Stopped Unique"]
+    + NOTSTOPPED_COLUMNS + ["Total Not Stopped", "Total Volume"]
+)
+
+# Rows are generated from the store this many at a time
+CHUNK_ROWS = 4096
+
+# Width of every column on the results and Form 2 sheets
+FIXED_COLUMN_WIDTH = 20
+
+# Table header style, as pandas.DataFrame.to_excel wrote it
+_THIN = Side(style="thin")
+_HEADER_FONT = Font(bold=True)
+_HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+_HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+
+# Columnar raw-data formats (pyarrow)
+PARQUET_SUFFIX = ".parquet"
+FEATHER_SUFFIX = ".feather"
+ARROW_METADATA_KEY = b"intersection_delay"
+ARROW_FORMAT_VERSION = 1
+
+# RAW_COLUMNS name -> ObservationStore column for the typed count columns
+_ARROW_STORE_COLUMNS = {
+    "Interval": "period",
+    "Minute": "minute",
+    **dict(zip(STOPPED_COLUMNS, STOPPED_FIELDS)),
+    "Total Stopped Unique": "unique_stopped",
+    **dict(zip(NOTSTOPPED_COLUMNS, NOTSTOPPED_FIELDS)),
+    "Total Not Stopped": "unique_notstopped",
+}
+
+# Info header labels -> metadata keys
+_INFO_KEYS = {
+    "Date:": "date",
+    "Intersection:": "intersection",
+    "Weather:": "weather",
+    "Start Time:": "start_time",
+}
+
+
+def _cell_text(value):
+    # value != value is True only for NaN
+    if value is None or value != value:
+        return ""
+    return str(value)
+
+
+def parse_raw_rows(rows):
+    """Parse raw-data rows (lists of cell values) into app structures.
+
+    Returns (data, unique_minute_map, info) where data is an ObservationStore.
+    Older workbooks without a "Total Stopped Unique" column stored the unique
+    stopped count under "Total Stopped". Directions are matched to DIRECTIONS
+    in any case; any other direction raises ValueError, since the results
+    would leave its rows out.
+    """
+    info = {"date": "", "intersection": "", "weather": "", "start_time": ""}
+    rows = iter(rows)
+    header = None
+    for row in rows:
+        first = _cell_text(row[0]) if len(row) else ""
+        if first in _INFO_KEYS:
+            info[_INFO_KEYS[first]] = _cell_text(row[1]) if len(row) > 1 else ""
+        elif first == "Time":
+            header = [_cell_text(c) for c in row]
+            break
+    if header is None:
+        raise ValueError("No data table header found")
+
+    col = {name: idx for idx, name in enumerate(header) if name}
+    unique_stopped_col = col.get("Total Stopped Unique", col.get("Total Stopped"))
+    stopped_cols = [col[name] for name in STOPPED_COLUMNS]
+    notstopped_cols = [col[name] for name in NOTSTOPPED_COLUMNS]
+    period_col, minute_col, direction_col = col["Interval"], col["Minute"], col["Direction"]
+    unique_notstopped_col = col["Total Not Stopped"]
+
+    data = ObservationStore()
+    unique_minute_map = {}
+    for row in rows:
+        if len(row) <= period_col or _cell_text(row[period_col]) == "":
+            continue
+        period = int(row[period_col])
+        minute = int(row[minute_col])
+        direction = normalize_direction(_cell_text(row[direction_col]))
+        stopped = [int(row[i] or 0) for i in stopped_cols]
+        notstopped = [int(row[i] or 0) for i in notstopped_cols]
+        u_st = int(row[unique_stopped_col] or 0)
+        u_ns = int(row[unique_notstopped_col] or 0)
+        data.append(period, minute, direction, stopped, u_st, notstopped, u_ns)
+        unique_minute_map[(period, direction, minute)] = {"stopped": u_st, "notstopped": u_ns}
+    check_directions(data.direction_names())
+    return data, unique_minute_map, info
+
+
+def check_directions(directions):
+    """Raise ValueError naming the directions (and first rows) that are not in DIRECTIONS."""
+    unknown = {}
+    for i, direction in enumerate(directions):
+        if direction not in DIRECTIONS:
+            unknown.setdefault(direction, []).append(i + 1)
+    if unknown:
+        details = "; ".join(
+            f"{direction!r} in data row{'s' if len(rows) > 1 else ''} {', '.join(map(str, rows[:5]))}"
+            f"{' ...' if len(rows) > 5 else ''}" for direction, rows in unknown.items())
+        raise ValueError(f"Unknown direction (expected {', '.join(DIRECTIONS)}): {details}")
+
+
+def parse_carryover_rows(rows):
+    """{(period, direction, minute): (same_stopped, same_notstopped)} from table rows.
+
+    The header is the first row with the CARRYOVER_COLUMNS names, in any
+    order and among other columns, so a raw-data sheet with the carry-over
+    columns added works as well as a sheet of carry-overs alone. Blank
+    carry-over cells count as 0.
+    """
+    rows = iter(rows)
+    for row in rows:
+        header = [_cell_text(c) for c in row]
+        if all(name in header for name in CARRYOVER_COLUMNS):
+            break
+    else:
+        raise ValueError(f"No carry-over header found; expected columns {', '.join(CARRYOVER_COLUMNS)}")
+
+    col = {name: idx for idx, name in enumerate(header) if name}
+    period_col, minute_col, direction_col = col["Interval"], col["Minute"], col["Direction"]
+    same_stopped_cols = [col[name] for name in SAME_STOPPED_COLUMNS]
+    same_notstopped_cols = [col[name] for name in SAME_NOTSTOPPED_COLUMNS]
+    carryovers = {}
+    for row in rows:
+        if len(row) <= period_col or _cell_text(row[period_col]) == "":
+            continue
+        key = (int(row[period_col]), normalize_direction(_cell_text(row[direction_col])), int(row[minute_col]))
+        carryovers[key] = (
+            [int(row[i] or 0) if i < len(row) else 0 for i in same_stopped_cols],
+            [int(row[i] or 0) if i < len(row) else 0 for i in same_notstopped_cols],
+        )
+    return carryovers
+
+
+def load_carryovers(filename):
+    """Read same-as-previous carry-overs from an xlsx or csv file (see parse_carryover_rows)."""
+    if str(filename).lower().endswith(".csv"):
+        with open(filename, newline="") as f:
+            return parse_carryover_rows(csv.reader(f))
+    wb = load_workbook(filename, read_only=True, data_only=True)
+    try:
+        return parse_carryover_rows(wb.worksheets[0].iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+
+def day_suffix(day):
+    """" +1d", " +2d", ... for days after the first of a multi-day count, else ""."""
+    return f" +{day}d" if day else ""
+
+
+def actual_time(start_time, period, minute):
+    """Clock time "HH:MM:SS" of a minute row for a "HH:MM:SS" study start time.
+
+    Multi-day counts wrap around midnight and carry the day, e.g.
+    "00:15:00 +1d", so rows of different days stay distinct.
+    """
+    try:
+        start_hour, start_minute, start_second = (int(part) for part in start_time.split(":"))
+    except ValueError:
+        return "00:00:00"
+
+    # Calculate total minutes from start
+    total_minutes = (period - 1) * 15 + (minute - 1)
+
+    # Add to start time
+    day, clock_minutes = divmod(start_hour * 60 + start_minute + total_minutes, 24 * 60)
+    current_hour, current_minute = divmod(clock_minutes, 60)
+
+    return f"{current_hour:02d}:{current_minute:02d}:{start_second:02d}{day_suffix(day)}"
+
+
+def iter_raw_rows(store, unique_minute_map, start_time):
+    """Rows of the save_data table (RAW_COLUMNS) for an ObservationStore.
+
+    Total Stopped / Total Not Stopped are overridden with the unique split of
+    each minute where one is recorded. Rows are generated CHUNK_ROWS at a
+    time, so memory does not grow with the session.
+    """
+    for start in range(0, len(store), CHUNK_ROWS):
+        stop = start + CHUNK_ROWS
+        periods = store.column("period", start, stop).tolist()
+        minutes = store.column("minute", start, stop).tolist()
+        directions = store.direction_names(start, stop)
+        stopped = store.columns(STOPPED_FIELDS, start, stop).tolist()
+        notstopped = store.columns(NOTSTOPPED_FIELDS, start, stop).tolist()
+        row_unique = store.columns(("unique_stopped", "unique_notstopped"), start, stop).tolist()
+        for period, minute, direction, st, ns, (row_st, row_ns) in zip(
+                periods, minutes, directions, stopped, notstopped, row_unique):
+            usplit = unique_minute_map.get((period, direction, minute))
+            if usplit is None:
+                # Fallback to original totals if unique not present
+                u_st, u_ns = row_st, row_ns
+            else:
+                u_st = int(usplit.get("stopped", 0))
+                u_ns = int(usplit.get("notstopped", 0))
+            yield [
+                actual_time(start_time, period, minute), period, minute, direction,
+                *st, sum(st), u_st,
+                *ns, u_ns, u_st + u_ns
+            ]
+
+
+def raw_rows(store, unique_minute_map, start_time):
+    """iter_raw_rows as a list."""
+    return list(iter_raw_rows(store, unique_minute_map, start_time))
+
+
+def raw_info(date, intersection, weather, start_time):
+    """Info header rows written above the raw-data table."""
+    return [
+        [RAW_TITLE],
+        ["Date:", date],
+        ["Intersection:", intersection],
+        ["Weather:", weather],
+        ["Start Time:", start_time],
+        [""]
+    ]
+
+
+def fitted_widths(header, rows):
+    """Column widths fitting the header and every value, from running maxima."""
+    widths = [len(str(name)) for name in header]
+    for row in rows:
+        for i, value in enumerate(row):
+            length = len(str(value))
+            if length > widths[i]:
+                widths[i] = length
+    return [width + 2 for width in widths]
+
+
+def _header_row(ws, header):
+    cells = []
+    for name in header:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.font = _HEADER_FONT
+        cell.border = _HEADER_BORDER
+        cell.alignment = _HEADER_ALIGNMENT
+        cells.append(cell)
+    return cells
+
+
+def write_sheets(filename, sheets):
+    """Stream sheets into a write-only workbook.
+
+    sheets is a list of (title, info_rows, header, rows, widths): info_rows
+    are written first, then the styled header and rows (any iterable), with
+    widths[i] applied to column i.
+    """
+    wb = Workbook(write_only=True)
+    for title, info_rows, header, rows, widths in sheets:
+        ws = wb.create_sheet(title)
+        for idx, width in enumerate(widths, start=1):
+            ws.column_dimensions[get_column_letter(idx)].width = width
+        for row in info_rows:
+            ws.append(row)
+        if header:
+            ws.append(_header_row(ws, header))
+        for row in rows:
+            ws.append(row)
+    wb.save(filename)
+
+
+def write_raw_workbook(filename, store, unique_minute_map, info):
+    """Write the save_data layout: info rows, then the RAW_COLUMNS table.
+
+    info is the metadata dict (date, intersection, weather, start_time). Rows
+    stream from the store; openpyxl writes the column widths before the first
+    row, so they come from a running-max pass over the same row generator.
+    """
+    start_time = info["start_time"]
+    widths = fitted_widths(RAW_COLUMNS, iter_raw_rows(store, unique_minute_map, start_time))
+    write_sheets(filename, [(
+        "Data",
+        raw_info(info["date"], info["intersection"], info["weather"], start_time),
+        RAW_COLUMNS, iter_raw_rows(store, unique_minute_map, start_time), widths
+    )])
+
+
+def write_raw_csv(filename, store, unique_minute_map, info):
+    """CSV version of write_raw_workbook."""
+    with open(filename, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        for item in raw_info(info["date"], info["intersection"], info["weather"], info["start_time"]):
+            writer.writerow([] if item == [""] else item)
+        writer.writerow(RAW_COLUMNS)
+        writer.writerows(iter_raw_rows(store, unique_minute_map, info["start_time"]))
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet and Feather files need the optional pyarrow package "
+                          "(pip install pyarrow)") from None
+    return pyarrow
+
+
+def is_arrow_file(filename):
+    return str(filename).lower().endswith((PARQUET_SUFFIX, FEATHER_SUFFIX))
+
+
+def raw_table(store, unique_minute_map, info):
+    """The save_data table as a pyarrow Table with typed columns.
+
+    info is the metadata dict (date, intersection, weather, start_time) and is
+    stored in the schema metadata.
+    """
+    pa = _pyarrow()
+    # Unique split per row, as in raw_rows
+    periods = store.column("period").tolist()
+    minutes = store.column("minute").tolist()
+    directions = store.direction_names()
+    unique = store.columns(("unique_stopped", "unique_notstopped"))
+    for i, key in enumerate(zip(periods, directions, minutes)):
+        usplit = unique_minute_map.get(key)
+        if usplit is not None:
+            unique[i] = (int(usplit.get("stopped", 0)), int(usplit.get("notstopped", 0)))
+    stopped = store.columns(STOPPED_FIELDS)
+
+    int32 = pa.int32()
+    columns = {
+        "Time": pa.array([actual_time(info["start_time"], p, m) for p, m in zip(periods, minutes)],
+                         pa.string()),
+        "Interval": pa.array(store.column("period"), int32),
+        "Minute": pa.array(store.column("minute"), pa.int16()),
+        "Direction": pa.array(directions, pa.string()).dictionary_encode(),
+    }
+    for name, field in zip(STOPPED_COLUMNS, STOPPED_FIELDS):
+        columns[name] = pa.array(store.column(field), int32)
+    columns["Total Stopped"] = pa.array(stopped.sum(axis=1), int32)
+    columns["Total Stopped Unique"] = pa.array(unique[:, 0], int32)
+    for name, field in zip(NOTSTOPPED_COLUMNS, NOTSTOPPED_FIELDS):
+        columns[name] = pa.array(store.column(field), int32)
+    columns["Total Not Stopped"] = pa.array(unique[:, 1], int32)
+    columns["Total Volume"] = pa.array(unique.sum(axis=1), int32)
+
+    metadata = {key: str(info.get(key, "")) for key in _INFO_KEYS.values()}
+    metadata["format_version"] = ARROW_FORMAT_VERSION
+    return pa.table(columns).replace_schema_metadata({ARROW_METADATA_KEY: json.dumps(metadata)})
+
+
+def write_raw_arrow(filename, store, unique_minute_map, info):
+    """Write the raw data as Parquet, or Feather for a .feather filename."""
+    table = raw_table(store, unique_minute_map, info)
+    if str(filename).lower().endswith(FEATHER_SUFFIX):
+        from pyarrow import feather
+
+        feather.write_feather(table, filename)
+    else:
+        from pyarrow import parquet
+
+        parquet.write_table(table, filename)
+
+
+def load_raw_arrow(filename):
+    """Load a Parquet or Feather file written by write_raw_arrow.
+
+    Returns (data, unique_minute_map, info) like load_raw_workbook.
+    """
+    _pyarrow()
+    if str(filename).lower().endswith(FEATHER_SUFFIX):
+        from pyarrow import feather
+
+        table = feather.read_table(filename)
+    else:
+        from pyarrow import parquet
+
+        table = parquet.read_table(filename)
+
+    info = {key: "" for key in _INFO_KEYS.values()}
+    raw_metadata = (table.schema.metadata or {}).get(ARROW_METADATA_KEY)
+    if raw_metadata:
+        metadata = json.loads(raw_metadata)
+        info.update((key, metadata.get(key, "")) for key in info)
+
+    columns = {field: table.column(name).to_numpy() for name, field in _ARROW_STORE_COLUMNS.items()}
+    directions = [normalize_direction(direction) for direction in table.column("Direction").to_pylist()]
+    check_directions(directions)
+    data = ObservationStore()
+    data.extend_columns(columns, directions)
+
+    unique_minute_map = {
+        (period, direction, minute): {"stopped": u_st, "notstopped": u_ns}
+        for period, direction, minute, u_st, u_ns in zip(
+            columns["period"].tolist(), directions, columns["minute"].tolist(),
+            columns["unique_stopped"].tolist(), columns["unique_notstopped"].tolist())
+    }
+    return data, unique_minute_map, info
+
+
+def load_raw(filename):
+    """Load raw data from an xlsx workbook, a csv file or a Parquet/Feather file."""
+    if is_arrow_file(filename):
+        return load_raw_arrow(filename)
+    if str(filename).lower().endswith(".csv"):
+        return load_raw_csv(filename)
+    return load_raw_workbook(filename)
+
+
+def load_raw_workbook(filename):
+    """Load a workbook written by save_data.
+
+    The sheet is streamed with openpyxl in read-only mode and each row goes
+    straight into the ObservationStore columns, with no DataFrame in between.
+    """
+    wb = load_workbook(filename, read_only=True, data_only=True)
+    try:
+        return parse_raw_rows(wb.worksheets[0].iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+
+def load_raw_csv(filename):
+    """Load a csv file written by save_data (see write_raw_csv)."""
+    with open(filename, newline="") as f:
+        return parse_raw_rows(csv.reader(f))
+
+
+def _record_table(records):
+    """(header, rows) for a list of dicts sharing their keys."""
+    if not records:
+        return [], []
+    return list(records[0]), [list(record.values()) for record in records]
+
+
+def interval_rows(results, intervals):
+    """Confidence Intervals sheet rows: table, period, direction, metric, estimate, low, high."""
+    tables = [("Overall", "All", direction, results.by_direction[direction], bounds)
+              for direction, bounds in intervals.by_direction.items()]
+    tables += [("Period", period, direction, results.by_period_direction[period][direction], bounds)
+               for period in sorted(intervals.by_period_direction)
+               for direction, bounds in intervals.by_period_direction[period].items()]
+    tables += [("Period Summary", period, "All", results.by_period[period], intervals.by_period[period])
+               for period in sorted(intervals.by_period)]
+    tables.append(("Study", "All", "All", results.overall, intervals.overall))
+    return [
+        [table, period, direction, metric, estimates[metric], low, high]
+        for table, period, direction, estimates, bounds in tables
+        for metric, (low, high) in bounds.items()
+    ]
+
+
+def write_results_workbook(filename, results, date, intersection, weather, intervals=None):
+    """Write the three result sheets produced by Calculate Results.
+
+    With intervals (a delay_engine.ConfidenceIntervals) a fourth sheet lists
+    the bootstrap bounds of every metric.
+    """
+    overall = _record_table([
+        {"Direction": direction, **data} for direction, data in results.by_direction.items()
+    ])
+    period = _record_table([
+        {"Period": period, "Direction": direction, **data}
+        for period in sorted(results.by_period_direction.keys())
+        for direction, data in results.by_period_direction[period].items()
+    ])
+    period_overall = _record_table([
+        {"Period": period, **results.by_period[period]} for period in sorted(results.by_period.keys())
+    ])
+    # Study information above the overall table
+    info = [
+        [RESULTS_TITLE],
+        ["Date:", date],
+        ["Intersection:", intersection],
+        ["Weather:", weather],
+        [""]
+    ]
+    sheets = [
+        ("Overall Results", info, *overall, [FIXED_COLUMN_WIDTH] * len(overall[0])),
+        ("Period Results", [], *period, [FIXED_COLUMN_WIDTH] * len(period[0])),
+        ("Period Summary", [], *period_overall, [FIXED_COLUMN_WIDTH] * len(period_overall[0])),
+    ]
+    if intervals is not None:
+        interval_info = [
+            [f"{intervals.confidence:.0%} Bootstrap Confidence Intervals"],
+            ["Replicates:", intervals.replicates],
+            ["Seed:", intervals.seed],
+            ["Method:", "Minutes resampled with replacement within each period and direction"],
+            [""]
+        ]
+        sheets.append(("Confidence Intervals", interval_info, INTERVAL_COLUMNS, interval_rows(results, intervals),
+                       [FIXED_COLUMN_WIDTH] * len(INTERVAL_COLUMNS)))
+    write_sheets(filename, sheets)
+
+
+def write_form2_workbook(filename, rows, info):
+    """Write a Form 2 sheet.
+
+    rows follow FORM2_COLUMNS; info is a list of [label, value] pairs written
+    under the title (Date, Location, Approach, ...).
+    """
+    write_sheets(filename, [(
+        "Form2", [[FORM2_TITLE]] + [list(item) for item in info] + [[""]],
+        FORM2_COLUMNS, rows, [FIXED_COLUMN_WIDTH] * len(FORM2_COLUMNS)
+    )])
@@ -0,0 +1,163 @@
+"""Crash-safe append-only journal of session events.
+
+Every counting event is written as one compact JSON array per line, e.g.
+
+    ["entry",1,3,"North",[0,1,0,0],1,[2,0,0,0],2]
+    ["unique",1,"North",4,2,1]
+    ["volume",1,"North",12]
+    ["info","2025-10-27","101 & Hollybrook","Cloudy","07","30","00","4"]
+    ["sample",4,1,2,0,"2025-10-27T07:31:00.004",3.2]
+    ["saved","/home/me/AM_DATA.xlsx"]
+
+record() only puts the event on a queue; a background thread writes, flushes
+and fsyncs in batches every flush_interval seconds, so the Tk thread never
+waits on the disk. A "clear" event truncates the file; "sample" events
+(sampling clock timestamps: index, period, minute, interval, time, ms late)
+are a log only and are not replayed. After Save Data the journal is
+cleared and restarted with a "saved" event naming the file, which holds
+every minute recorded before it. read_events() replays a journal and
+tolerates a torn last line from a crash mid-write.
+
+Each running app claims its own journal with claim(): the first of
+session.journal, session-2.journal, ... whose lock no other process holds.
+The lock is an OS file lock, so a crashed app leaves none behind.
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".intersection_delay", "session.journal")
+
+# Journals tried by claim(), one per app running at the same time
+MAX_INSTANCES = 16
+
+_STOP = object()
+
+
+def journal_path():
+    """Journal location from $DELAY_JOURNAL (empty disables it), else DEFAULT_PATH."""
+    return os.environ.get("DELAY_JOURNAL", DEFAULT_PATH) or None
+
+
+def _try_lock(f):
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def claim(path, max_instances=MAX_INSTANCES):
+    """(journal path, open lock file) of the first journal slot no other app holds.
+
+    Slot n > 1 of "session.journal" is "session-n.journal". The lock lasts
+    until the returned file is closed (SessionJournal.close does it).
+    Raises OSError when every slot is taken.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    stem, ext = os.path.splitext(path)
+    for n in range(1, max_instances + 1):
+        candidate = path if n == 1 else f"{stem}-{n}{ext}"
+        lock = open(candidate + ".lock", "a+b")
+        if _try_lock(lock):
+            return candidate, lock
+        lock.close()
+    raise OSError(f"All {max_instances} session journals next to {path} are in use")
+
+
+def read_events(path):
+    """All complete events in the journal at path, oldest first."""
+    events = []
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash; everything before it is intact
+                    break
+                if event and event[0] == "clear":
+                    events.clear()
+                else:
+                    events.append(event)
+    except FileNotFoundError:
+        pass
+    return events
+
+
+class SessionJournal:
+    """Append-only event journal with batched flush and fsync on a writer thread."""
+
+    def __init__(self, path, flush_interval=0.25, truncate=False, lock=None):
+        self.path = path
+        self.flush_interval = flush_interval
+        # Lock file from claim(), released by close()
+        self.lock = lock
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._queue = queue.Queue()
+        if truncate:
+            self._queue.put(("clear",))
+        self._thread = threading.Thread(target=self._run, name="session-journal", daemon=True)
+        self._thread.start()
+
+    def record(self, kind, *fields):
+        """Queue one event; never touches the disk on the calling thread."""
+        self._queue.put((kind,) + fields)
+
+    def clear(self):
+        """Truncate the journal (after the events already queued are written)."""
+        self._queue.put(("clear",))
+
+    def close(self, timeout=2.0):
+        """Write everything still queued, stop the writer thread and release the lock."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self.lock is not None:
+            self.lock.close()
+            self.lock = None
+
+    def _run(self):
+        with open(self.path, "ab") as f:
+            while True:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while batch[-1] is not _STOP:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                if self._write(f, batch):
+                    return
+
+    def _write(self, f, batch):
+        stop = False
+        lines = []
+        for event in batch:
+            if event is _STOP:
+                stop = True
+            elif event[0] == "clear":
+                lines.clear()
+                f.flush()
+                f.truncate(0)
+            else:
+                lines.append(json.dumps(event, separators=(",", ":")).encode() + b"\n")
+        f.write(b"".join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+        return stop
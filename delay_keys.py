@@ -0,0 +1,148 @@
+"""Keyboard counting mode: hotkeys for the interval and unique counters.
+
+Each keystroke adds to a pending integer; the StringVars (and the unique
+split, journal and approach tally behind the unique counters) are updated
+at most once per frame, however fast the keys arrive.
+
+Hotkeys are keysyms per counter name. DEFAULT_HOTKEYS can be overridden by a
+JSON object in $DELAY_HOTKEYS or ~/.intersection_delay/hotkeys.json, e.g.
+
+    {"stopped_0": "z", "unique_stopped": "space"}
+"""
+import json
+import os
+
+from delay_store import NOTSTOPPED_FIELDS, STOPPED_FIELDS
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".intersection_delay", "hotkeys.json")
+
+# Counter or action name -> keysym
+DEFAULT_HOTKEYS = {
+    "stopped_0": "1", "stopped_15": "2", "stopped_30": "3", "stopped_45": "4",
+    "notstopped_0": "q", "notstopped_15": "w", "notstopped_30": "e", "notstopped_45": "r",
+    "unique_stopped": "a", "unique_notstopped": "s",
+    "add_entry": "Return",
+    "undo": "BackSpace",
+}
+
+COUNTERS = STOPPED_FIELDS + NOTSTOPPED_FIELDS + ("unique_stopped", "unique_notstopped")
+UNIQUE_COUNTERS = ("unique_stopped", "unique_notstopped")
+
+# One display refresh per frame at 60 Hz
+FRAME_MS = 16
+
+# Widgets that take typed text; their keystrokes are never counted
+_TEXT_WIDGETS = {"Entry", "TEntry", "Spinbox", "TSpinbox", "TCombobox", "Text"}
+
+
+def hotkeys_path():
+    return os.environ.get("DELAY_HOTKEYS") or DEFAULT_PATH
+
+
+def load_hotkeys(path=None):
+    """DEFAULT_HOTKEYS updated from the JSON file at path, if it exists.
+
+    Raises ValueError for unknown names or a keysym bound twice.
+    """
+    hotkeys = dict(DEFAULT_HOTKEYS)
+    path = path or hotkeys_path()
+    try:
+        with open(path) as f:
+            overrides = json.load(f)
+    except FileNotFoundError:
+        return hotkeys
+    unknown = set(overrides) - set(DEFAULT_HOTKEYS)
+    if unknown:
+        raise ValueError(f"Unknown hotkey names in {path}: {', '.join(sorted(unknown))}")
+    hotkeys.update(overrides)
+    keysyms = list(hotkeys.values())
+    duplicates = sorted({k for k in keysyms if keysyms.count(k) > 1})
+    if duplicates:
+        raise ValueError(f"Keys bound to more than one counter in {path}: {', '.join(duplicates)}")
+    return hotkeys
+
+
+def hotkey_summary(hotkeys):
+    """Short help text, e.g. "Stopped 1 2 3 4 | Not stopped q w e r | ..."."""
+    return (
+        f"Stopped {' '.join(hotkeys[n] for n in STOPPED_FIELDS)} | "
+        f"Not stopped {' '.join(hotkeys[n] for n in NOTSTOPPED_FIELDS)} | "
+        f"Unique {hotkeys['unique_stopped']} / {hotkeys['unique_notstopped']} | "
+        f"Add entry {hotkeys['add_entry']} | Undo {hotkeys['undo']}"
+    )
+
+
+def _int(text):
+    try:
+        return int(text)
+    except ValueError:
+        return 0
+
+
+class KeyboardCounter:
+    """Counts hotkey presses into StringVars, refreshed once per frame.
+
+    counters maps counter names to their StringVars; on_unique is called
+    after a refresh that changed a unique counter; actions maps action names
+    (add_entry) to callables, run after pending counts are written.
+    """
+
+    def __init__(self, root, hotkeys, counters, on_unique, actions, frame_ms=FRAME_MS):
+        self.root = root
+        self.counters = counters
+        self.on_unique = on_unique
+        self.actions = actions
+        self.frame_ms = frame_ms
+        self.keys = {keysym: name for name, keysym in hotkeys.items()}
+        # Counter name -> value not yet written to its StringVar
+        self.pending = {}
+        # Counter names in keystroke order, for undo
+        self.history = []
+        self._after_id = None
+
+    def on_key(self, event):
+        """<KeyPress> handler for the main window."""
+        if event.widget.winfo_class() in _TEXT_WIDGETS:
+            return None
+        name = self.keys.get(event.keysym)
+        if name is None:
+            return None
+        if name == "undo":
+            if self.history:
+                self.bump(self.history.pop(), -1)
+        elif name in self.actions:
+            self.flush()
+            self.actions[name]()
+        else:
+            self.bump(name, 1)
+            self.history.append(name)
+        return "break"
+
+    def bump(self, name, delta):
+        # The StringVar is read only for the first key of a frame
+        if name not in self.pending:
+            self.pending[name] = _int(self.counters[name].get())
+        self.pending[name] = max(0, self.pending[name] + delta)
+        if self._after_id is None:
+            self._after_id = self.root.after(self.frame_ms, self.flush)
+
+    def flush(self, on_unique=None):
+        """Write pending counts to the StringVars now.
+
+        on_unique replaces the constructor's callback for this flush, for
+        callers whose context has already moved on.
+        """
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        for name, value in pending.items():
+            self.counters[name].set(str(value))
+        if any(name in pending for name in UNIQUE_COUNTERS):
+            (on_unique or self.on_unique)()
+
+    def reset(self):
+        """Forget the undo history (the counters were reset for a new minute)."""
+        self.history.clear()
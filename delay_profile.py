@@ -0,0 +1,188 @@
+"""Opt-in latency instrumentation for Tk callbacks.
+
+Set DELAY_PROFILE to a file path (or to 1 for DEFAULT_PATH) and the app wraps
+its hot callbacks with CallbackProfiler.wrap(). Each call costs two
+perf_counter_ns() reads and a few integer updates; latencies go into fixed
+power-of-two microsecond buckets, so nothing grows with the number of calls.
+
+Callbacks that wait on dialogs (Calculate Results, Save Data) are not
+wrapped whole; section() times only their compute and write parts, so the
+histograms never include the time a user spent answering a dialog.
+
+The summary is written as JSON when the window closes, and F12 opens a debug
+panel with the same table, refreshed every second. Times are inclusive: a
+callback that calls another instrumented one (add_entry -> next_minute)
+counts both.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".intersection_delay", "callbacks.json")
+
+# Bucket i holds latencies below 2**i microseconds; the last bucket is open-ended
+NUM_BUCKETS = 25
+
+
+def profile_path():
+    """Summary file from $DELAY_PROFILE ("1" means DEFAULT_PATH), or None when disabled."""
+    value = os.environ.get("DELAY_PROFILE", "")
+    if value in ("", "0"):
+        return None
+    return DEFAULT_PATH if value == "1" else value
+
+
+def bucket_bound_ms(i):
+    """Upper bound of bucket i in milliseconds (None for the open-ended last bucket)."""
+    return None if i == NUM_BUCKETS - 1 else (1 << i) / 1000
+
+
+class CallbackStats:
+    """Call count, total, max and latency histogram of one callback."""
+
+    __slots__ = ("calls", "total_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * NUM_BUCKETS
+
+    def add(self, elapsed_ns):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.buckets[min((elapsed_ns // 1000).bit_length(), NUM_BUCKETS - 1)] += 1
+
+    def percentile_ms(self, q):
+        """Upper bucket bound below which a fraction q of the calls fell."""
+        if not self.calls:
+            return 0.0
+        target = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                bound = bucket_bound_ms(i)
+                return self.max_ns / 1e6 if bound is None else min(bound, self.max_ns / 1e6)
+        return self.max_ns / 1e6
+
+    def summary(self):
+        return {
+            "calls": self.calls,
+            "total_ms": self.total_ns / 1e6,
+            "mean_ms": self.total_ns / 1e6 / self.calls if self.calls else 0.0,
+            "p50_ms": self.percentile_ms(0.50),
+            "p95_ms": self.percentile_ms(0.95),
+            "p99_ms": self.percentile_ms(0.99),
+            "max_ms": self.max_ns / 1e6,
+            # Only the non-empty buckets; le_ms is None for the open-ended one
+            "histogram": [
+                {"le_ms": bucket_bound_ms(i), "count": count}
+                for i, count in enumerate(self.buckets) if count
+            ],
+        }
+
+
+class CallbackProfiler:
+    """Per-callback latency statistics collected by wrapped callables."""
+
+    def __init__(self):
+        self.stats = {}
+        self.started = time.time()
+        self._panel = None
+
+    def wrap(self, name, func):
+        """func wrapped so every call is timed under name, even if it raises."""
+        stats = self.stats.setdefault(name, CallbackStats())
+        clock = time.perf_counter_ns
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.add(clock() - start)
+
+        return timed
+
+    @contextmanager
+    def section(self, name):
+        """Time the with-block under name, even if it raises."""
+        stats = self.stats.setdefault(name, CallbackStats())
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            stats.add(time.perf_counter_ns() - start)
+
+    def register(self, names):
+        """Show section names in the panel and summary before their first use."""
+        for name in names:
+            self.stats.setdefault(name, CallbackStats())
+
+    def instrument(self, obj, names):
+        """Replace the bound methods obj.<name> with timed wrappers.
+
+        Call this before widgets capture the methods as commands.
+        """
+        for name in names:
+            setattr(obj, name, self.wrap(name, getattr(obj, name)))
+
+    def summary(self):
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "duration_s": time.time() - self.started,
+            "callbacks": {name: stats.summary() for name, stats in self.stats.items()},
+        }
+
+    def dump(self, path):
+        """Write summary() as JSON to path."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def show_panel(self, root, refresh_ms=1000):
+        """Open a Toplevel table of the statistics, refreshed every refresh_ms.
+
+        If the panel is already open it is raised instead of opening another.
+        """
+        import tkinter as tk
+        from tkinter import ttk
+
+        if self._panel is not None and self._panel.winfo_exists():
+            self._panel.deiconify()
+            self._panel.lift()
+            return self._panel
+
+        columns = ("calls", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+        window = tk.Toplevel(root)
+        window.title("Callback Timing")
+        tree = ttk.Treeview(window, columns=columns, height=len(self.stats))
+        tree.heading("#0", text="Callback")
+        tree.column("#0", width=200)
+        for col in columns:
+            tree.heading(col, text=col.replace("_ms", " ms"))
+            tree.column(col, width=80, anchor="e")
+        tree.pack(fill="both", expand=True, padx=5, pady=5)
+        items = {}
+
+        def refresh():
+            if not window.winfo_exists():
+                return
+            for name, stats in list(self.stats.items()):
+                if name not in items:
+                    items[name] = tree.insert("", "end", text=name)
+                s = stats.summary()
+                tree.item(items[name], values=(s["calls"], *(f"{s[col]:.2f}" for col in columns[1:])))
+            window.after(refresh_ms, refresh)
+
+        refresh()
+        self._panel = window
+        return window
@@ -0,0 +1,262 @@
+"""Optional SQLite repository of every saved delay study.
+
+Set DELAY_REPOSITORY to a database path (or to 1 for DEFAULT_PATH) and
+Save Data / Calculate Results also store the session here: the minute rows,
+the per-minute unique splits and the computed result tables. A study is
+identified by (intersection, date, start time); saving it again replaces it.
+Each save is one transaction with executemany() inserts.
+
+minute_rows, unique_splits and results carry intersection and date next to
+study_id and are indexed on (intersection, date, period, direction), so
+questions across many studies are answered from the indexes:
+
+    python delay_repository.py --intersection "101 & Hollybrook" --before 12:00
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".intersection_delay", "studies.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS studies (
+    id INTEGER PRIMARY KEY,
+    intersection TEXT NOT NULL,
+    date TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    weather TEXT,
+    num_periods INTEGER,
+    saved_at TEXT,
+    UNIQUE (intersection, date, start_time)
+);
+CREATE TABLE IF NOT EXISTS minute_rows (
+    study_id INTEGER NOT NULL REFERENCES studies(id) ON DELETE CASCADE,
+    intersection TEXT NOT NULL,
+    date TEXT NOT NULL,
+    period INTEGER NOT NULL,
+    minute INTEGER NOT NULL,
+    direction TEXT NOT NULL,
+    stopped_0 INTEGER, stopped_15 INTEGER, stopped_30 INTEGER, stopped_45 INTEGER,
+    unique_stopped INTEGER,
+    notstopped_0 INTEGER, notstopped_15 INTEGER, notstopped_30 INTEGER, notstopped_45 INTEGER,
+    unique_notstopped INTEGER
+);
+CREATE TABLE IF NOT EXISTS unique_splits (
+    study_id INTEGER NOT NULL REFERENCES studies(id) ON DELETE CASCADE,
+    intersection TEXT NOT NULL,
+    date TEXT NOT NULL,
+    period INTEGER NOT NULL,
+    direction TEXT NOT NULL,
+    minute INTEGER NOT NULL,
+    stopped INTEGER,
+    notstopped INTEGER
+);
+-- period / direction are NULL on the all-periods / all-directions rows
+CREATE TABLE IF NOT EXISTS results (
+    study_id INTEGER NOT NULL REFERENCES studies(id) ON DELETE CASCADE,
+    intersection TEXT NOT NULL,
+    date TEXT NOT NULL,
+    period INTEGER,
+    direction TEXT,
+    total_vehicles INTEGER,
+    total_stopped INTEGER,
+    total_stopped_unique INTEGER,
+    total_delay REAL,
+    avg_delay_stopped REAL,
+    avg_delay_approach REAL,
+    percent_stopped REAL
+);
+CREATE INDEX IF NOT EXISTS minute_rows_lookup ON minute_rows (intersection, date, period, direction);
+CREATE INDEX IF NOT EXISTS minute_rows_study ON minute_rows (study_id);
+CREATE INDEX IF NOT EXISTS unique_splits_lookup ON unique_splits (intersection, date, period, direction);
+CREATE INDEX IF NOT EXISTS unique_splits_study ON unique_splits (study_id);
+CREATE INDEX IF NOT EXISTS results_lookup ON results (intersection, date, period, direction);
+CREATE INDEX IF NOT EXISTS results_study ON results (study_id);
+"""
+
+_ROW_COLUMNS = (
+    "period", "minute", "stopped_0", "stopped_15", "stopped_30", "stopped_45", "unique_stopped",
+    "notstopped_0", "notstopped_15", "notstopped_30", "notstopped_45", "unique_notstopped",
+)
+
+# DelayResults metric name -> results column
+_RESULT_COLUMNS = {
+    "Total Vehicles": "total_vehicles",
+    "Total Stopped": "total_stopped",
+    "Total Stopped Unique": "total_stopped_unique",
+    "Total Delay (sec)": "total_delay",
+    "Avg Delay per Stopped (sec)": "avg_delay_stopped",
+    "Avg Delay per Approach (sec)": "avg_delay_approach",
+    "Percent Stopped": "percent_stopped",
+}
+
+
+def repository_path():
+    """Database from $DELAY_REPOSITORY ("1" means DEFAULT_PATH), or None when disabled."""
+    value = os.environ.get("DELAY_REPOSITORY", "")
+    if value in ("", "0"):
+        return None
+    return DEFAULT_PATH if value == "1" else value
+
+
+class StudyRepository:
+    """SQLite store of studies, their minute rows, unique splits and results."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Batch workers may write at the same time; wait for the lock instead of failing
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def save_session(self, info, store, unique_minute_map, results, num_periods=None):
+        """Store (or replace) one study in a single transaction; returns its id.
+
+        info holds date, intersection, weather and start_time; store is an
+        ObservationStore and results a delay_engine.DelayResults.
+        """
+        intersection, date = info["intersection"], info["date"]
+        start_time = normalize_time(info["start_time"])
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM studies WHERE intersection = ? AND date = ? AND start_time = ?",
+                (intersection, date, start_time))
+            study_id = self.conn.execute(
+                "INSERT INTO studies (intersection, date, start_time, weather, num_periods, saved_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (intersection, date, start_time, info.get("weather", ""),
+                 num_periods or results.arrays.num_periods, time.strftime("%Y-%m-%dT%H:%M:%S"))
+            ).lastrowid
+
+            columns = [store.column(name).tolist() for name in _ROW_COLUMNS]
+            self.conn.executemany(
+                f"INSERT INTO minute_rows (study_id, intersection, date, direction, {', '.join(_ROW_COLUMNS)}) "
+                f"VALUES (?, ?, ?, ?{', ?' * len(_ROW_COLUMNS)})",
+                ((study_id, intersection, date, direction, *values)
+                 for direction, *values in zip(store.direction_names(), *columns)))
+
+            self.conn.executemany(
+                "INSERT INTO unique_splits (study_id, intersection, date, period, direction, minute, "
+                "stopped, notstopped) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((study_id, intersection, date, period, direction, minute,
+                  int(split.get("stopped", 0)), int(split.get("notstopped", 0)))
+                 for (period, direction, minute), split in unique_minute_map.items()))
+
+            self.conn.executemany(
+                f"INSERT INTO results (study_id, intersection, date, period, direction, "
+                f"{', '.join(_RESULT_COLUMNS.values())}) VALUES (?, ?, ?, ?, ?{', ?' * len(_RESULT_COLUMNS)})",
+                ((study_id, intersection, date, period, direction, *(metrics[name] for name in _RESULT_COLUMNS))
+                 for period, direction, metrics in _result_rows(results)))
+        return study_id
+
+    def studies(self, intersection=None, date_from=None, date_to=None, start_after=None, start_before=None):
+        """Matching studies with their overall results, oldest first.
+
+        Dates are "YYYY-MM-DD" and start times "HH:MM[:SS]" (start_before is
+        exclusive), so start_before="12:00" selects the AM studies.
+        """
+        where, params = _study_filter(intersection, date_from, date_to, start_after, start_before)
+        cursor = self.conn.execute(
+            "SELECT s.id, s.intersection, s.date, s.start_time, s.weather, "
+            "r.total_vehicles, r.total_delay, r.avg_delay_approach, r.percent_stopped "
+            "FROM studies s JOIN results r ON r.study_id = s.id "
+            f"WHERE r.period IS NULL AND r.direction IS NULL{where} "
+            "ORDER BY s.date, s.start_time", params)
+        names = [c[0] for c in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def average_delay(self, intersection=None, date_from=None, date_to=None, start_after=None,
+                      start_before=None, direction=None):
+        """Average delay per approach vehicle over the matching studies.
+
+        Pooled over all vehicles (total delay / total vehicles), for one
+        direction or all of them. Returns (seconds per vehicle, study count).
+        """
+        where, params = _study_filter(intersection, date_from, date_to, start_after, start_before)
+        if direction is None:
+            where += " AND r.direction IS NULL"
+        else:
+            where += " AND r.direction = ?"
+            params.append(direction)
+        delay, vehicles, count = self.conn.execute(
+            "SELECT SUM(r.total_delay), SUM(r.total_vehicles), COUNT(DISTINCT s.id) "
+            "FROM studies s JOIN results r ON r.study_id = s.id "
+            f"WHERE r.period IS NULL{where}", params).fetchone()
+        return (delay / vehicles if vehicles else 0.0), count
+
+
+def normalize_time(text):
+    """"8:0:00" -> "08:00:00" so start times compare as strings."""
+    try:
+        parts = [int(part) for part in text.split(":")]
+    except ValueError:
+        return text
+    return ":".join(f"{part:02d}" for part in parts + [0] * (3 - len(parts)))
+
+
+def _result_rows(results):
+    """(period, direction, metrics) for every table of a DelayResults; None means all."""
+    for period, by_direction in results.by_period_direction.items():
+        for direction, metrics in by_direction.items():
+            yield period, direction, metrics
+    for period, metrics in results.by_period.items():
+        yield period, None, metrics
+    for direction, metrics in results.by_direction.items():
+        yield None, direction, metrics
+    yield None, None, results.overall
+
+
+def _study_filter(intersection, date_from, date_to, start_after, start_before):
+    clauses, params = [], []
+    start_after = start_after and normalize_time(start_after)
+    start_before = start_before and normalize_time(start_before)
+    for clause, value in (("s.intersection = ?", intersection), ("s.date >= ?", date_from),
+                          ("s.date <= ?", date_to), ("s.start_time >= ?", start_after),
+                          ("s.start_time < ?", start_before)):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+    return "".join(" AND " + c for c in clauses), params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the delay study repository.")
+    parser.add_argument("--db", default=repository_path() or DEFAULT_PATH,
+                        help="database path (default: $DELAY_REPOSITORY or ~/.intersection_delay/studies.sqlite)")
+    parser.add_argument("--intersection", help="only this intersection")
+    parser.add_argument("--from", dest="date_from", help="first date, YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", help="last date, YYYY-MM-DD")
+    parser.add_argument("--after", help="studies starting at or after HH:MM")
+    parser.add_argument("--before", help="studies starting before HH:MM (e.g. 12:00 for AM)")
+    parser.add_argument("--direction", help="average one approach only")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"No repository at {args.db}.", file=sys.stderr)
+        return 1
+    repo = StudyRepository(args.db)
+    try:
+        filters = dict(intersection=args.intersection, date_from=args.date_from, date_to=args.date_to,
+                       start_after=args.after, start_before=args.before)
+        for study in repo.studies(**filters):
+            print(f"{study['date']} {study['start_time']}  {study['intersection']:<30} "
+                  f"{study['total_vehicles']:>6} veh  {study['avg_delay_approach']:7.2f} s/veh  "
+                  f"{study['percent_stopped']:5.1f}% stopped")
+        average, count = repo.average_delay(direction=args.direction, **filters)
+        print(f"Average delay per approach vehicle over {count} studies: {average:.2f} s")
+    finally:
+        repo.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
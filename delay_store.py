@@ -0,0 +1,416 @@
+"""Session state containers used by DelayStudyApp (no Tk).
+
+NumPy is imported inside the array accessors so that building an empty
+session at startup does not pay for it.
+"""
+from array import array
+from collections.abc import Mapping
+
+DIRECTIONS = ["North", "South", "East", "West"]
+MINUTES_PER_PERIOD = 15
+
+STOPPED_FIELDS = ("stopped_0", "stopped_15", "stopped_30", "stopped_45")
+NOTSTOPPED_FIELDS = ("notstopped_0", "notstopped_15", "notstopped_30", "notstopped_45")
+
+# Column name -> array typecode. Directions are stored as small integer codes.
+_COLUMN_TYPES = {
+    "period": "i",
+    "minute": "h",
+    "direction": "b",
+    **{name: "i" for name in STOPPED_FIELDS},
+    "unique_stopped": "i",
+    **{name: "i" for name in NOTSTOPPED_FIELDS},
+    "unique_notstopped": "i",
+}
+
+
+class ObservationStore:
+    """Columnar store of minute rows, one typed array per column.
+
+    Row order matches the Collected Data table. row(i) and iteration give the
+    table tuple (period, minute, direction, s0, s15, s30, s45, unique_stopped,
+    n0, n15, n30, n45, unique_notstopped, total); column() and group_by()
+    return NumPy arrays for vectorized consumers.
+
+    Rows are also indexed by period as they are appended, so the rows of one
+    period are found in O(1) however many periods the study runs. version
+    increases on every change, so results computed from the store can be
+    reused until it moves.
+    """
+
+    def __init__(self):
+        self._columns = {name: array(code) for name, code in _COLUMN_TYPES.items()}
+        # Code -> direction name; the four compass directions always get codes 0-3
+        self.directions = list(DIRECTIONS)
+        self._direction_codes = {name: code for code, name in enumerate(self.directions)}
+        # Period -> row indices, in row order
+        self._period_rows = {}
+        self.version = 0
+
+    def __len__(self):
+        return len(self._columns["period"])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def direction_code(self, direction):
+        code = self._direction_codes.get(direction)
+        if code is None:
+            code = self._direction_codes[direction] = len(self.directions)
+            self.directions.append(direction)
+        return code
+
+    def append(self, period, minute, direction, stopped, unique_stopped, notstopped, unique_notstopped):
+        """Append one minute row; stopped / notstopped are the four interval counts."""
+        cols = self._columns
+        self.version += 1
+        rows = self._period_rows.get(period)
+        if rows is None:
+            rows = self._period_rows[period] = array("l")
+        rows.append(len(cols["period"]))
+        cols["period"].append(period)
+        cols["minute"].append(minute)
+        cols["direction"].append(self.direction_code(direction))
+        for name, value in zip(STOPPED_FIELDS, stopped):
+            cols[name].append(value)
+        cols["unique_stopped"].append(unique_stopped)
+        for name, value in zip(NOTSTOPPED_FIELDS, notstopped):
+            cols[name].append(value)
+        cols["unique_notstopped"].append(unique_notstopped)
+
+    def extend(self, rows):
+        """Append table tuples (the layout yielded by iteration)."""
+        for r in rows:
+            self.append(r[0], r[1], r[2], r[3:7], r[7], r[8:12], r[12])
+
+    def extend_columns(self, columns, directions):
+        """Bulk append from whole columns.
+
+        columns maps every column name except "direction" to an equal-length
+        sequence; directions is the matching sequence of direction names.
+        """
+        import numpy as np
+
+        start = len(self)
+        self.version += 1
+        names = list(dict.fromkeys(directions))
+        lut = np.array([self.direction_code(name) for name in names], dtype=np.int8)
+        position = {name: i for i, name in enumerate(names)}
+        codes = lut[np.array([position[name] for name in directions], dtype=np.intp)] if names else lut
+        for name, col in self._columns.items():
+            values = codes if name == "direction" else columns[name]
+            col.frombytes(np.ascontiguousarray(values, dtype=col.typecode).tobytes())
+
+        periods = self.column("period", start)
+        for period in np.unique(periods).tolist():
+            rows = self._period_rows.get(period)
+            if rows is None:
+                rows = self._period_rows[period] = array("l")
+            rows.extend((np.nonzero(periods == period)[0] + start).tolist())
+
+    def extend_store(self, other):
+        """Bulk append every row of another ObservationStore."""
+        self.extend_columns({name: other.column(name) for name in self._columns if name != "direction"},
+                            other.direction_names())
+
+    def take(self, rows):
+        """New store holding the given rows (an index array), in that order."""
+        sub = ObservationStore()
+        codes = self.column("direction")[rows].tolist()
+        sub.extend_columns({name: self.column(name)[rows] for name in self._columns if name != "direction"},
+                           [self.directions[code] for code in codes])
+        return sub
+
+    def row(self, i):
+        cols = self._columns
+        u_st = cols["unique_stopped"][i]
+        u_ns = cols["unique_notstopped"][i]
+        return (
+            cols["period"][i], cols["minute"][i], self.directions[cols["direction"][i]],
+            *(cols[name][i] for name in STOPPED_FIELDS), u_st,
+            *(cols[name][i] for name in NOTSTOPPED_FIELDS), u_ns,
+            u_st + u_ns
+        )
+
+    def column(self, name, start=None, stop=None):
+        """Rows start:stop of one column as a NumPy array (a copy, safe to keep)."""
+        import numpy as np
+
+        # Slicing the array first means NumPy never holds a buffer on the
+        # live column, which would block further appends
+        return np.frombuffer(self._columns[name][start:stop], dtype=self._columns[name].typecode)
+
+    def columns(self, names, start=None, stop=None):
+        """Several columns stacked as an (n, len(names)) array."""
+        import numpy as np
+
+        return np.column_stack([self.column(name, start, stop) for name in names]) if names else None
+
+    def periods(self):
+        """Sorted periods that have at least one row."""
+        return sorted(self._period_rows)
+
+    def period_rows(self, period):
+        """Row indices of one period as a NumPy array (empty if none)."""
+        import numpy as np
+
+        rows = self._period_rows.get(period)
+        return np.frombuffer(rows[:], dtype=rows.typecode) if rows else np.zeros(0, dtype=np.intp)
+
+    def direction_names(self, start=None, stop=None):
+        return [self.directions[code] for code in self._columns["direction"][start:stop]]
+
+    def group_by(self, *names):
+        """{key tuple: row index array} grouping rows by the given columns.
+
+        Direction keys are returned as names, not codes.
+        """
+        import numpy as np
+
+        if not len(self):
+            return {}
+        keys = self.columns(list(names))
+        unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(unique_keys)))[:-1]
+        groups = {}
+        for key, rows in zip(unique_keys.tolist(), np.split(order, bounds)):
+            groups[tuple(
+                self.directions[v] if name == "direction" else v for name, v in zip(names, key)
+            )] = rows
+        return groups
+
+    def clear(self):
+        self.version += 1
+        for col in self._columns.values():
+            del col[:]
+        self._period_rows.clear()
+
+
+_DIRECTION_INDEX = {name: code for code, name in enumerate(DIRECTIONS)}
+
+
+def normalize_direction(text):
+    """The DIRECTIONS name text spells in any case or padding ("WEST", " west"), else the stripped text."""
+    text = str(text).strip()
+    name = text.title()
+    return name if name in _DIRECTION_INDEX else text
+
+
+class UniqueMinuteArray(Mapping):
+    """Per-minute unique splits in one dense integer array.
+
+    The (stopped, notstopped) split of a minute sits at [period - 1,
+    direction code, minute - 1, 0 / 1] of a flat array('i') that grows a
+    period at a time, and a presence bitmap marks the minutes recorded so far.
+    Lookups are index arithmetic and a minute costs 8 bytes instead of two
+    dicts. Keys outside the layout (other directions, minutes past 15) are
+    kept in a small dict.
+
+    Reads behave like the {(period, direction, minute): {"stopped": int,
+    "notstopped": int}} dict it replaces; the value dicts are built on
+    access, so change splits with set(), not by editing them.
+    """
+
+    def __init__(self):
+        self._values = array("i")
+        self._present = bytearray()
+        self._extra = {}
+        self._count = 0
+
+    def _cell(self, period, direction, minute):
+        code = _DIRECTION_INDEX.get(direction)
+        if code is None or period < 1 or not 1 <= minute <= MINUTES_PER_PERIOD:
+            return None
+        return ((period - 1) * len(DIRECTIONS) + code) * MINUTES_PER_PERIOD + minute - 1
+
+    def _has(self, cell):
+        return cell >> 3 < len(self._present) and self._present[cell >> 3] >> (cell & 7) & 1
+
+    @property
+    def num_periods(self):
+        """Periods covered by the dense array."""
+        return len(self._values) // (2 * len(DIRECTIONS) * MINUTES_PER_PERIOD)
+
+    def split(self, period, direction, minute):
+        """(stopped, notstopped) for one minute, or None if not recorded."""
+        cell = self._cell(period, direction, minute)
+        if cell is None:
+            return self._extra.get((period, direction, minute))
+        if not self._has(cell):
+            return None
+        return self._values[2 * cell], self._values[2 * cell + 1]
+
+    def set(self, period, direction, minute, stopped, notstopped):
+        """Store one split; returns the previous one, or None."""
+        cell = self._cell(period, direction, minute)
+        if cell is None:
+            previous = self._extra.get((period, direction, minute))
+            self._extra[(period, direction, minute)] = (stopped, notstopped)
+            self._count += previous is None
+            return previous
+        if 2 * cell >= len(self._values):
+            # Grow to whole periods; new minutes start unrecorded at zero
+            cells = period * len(DIRECTIONS) * MINUTES_PER_PERIOD
+            self._values.frombytes(bytes(self._values.itemsize * (2 * cells - len(self._values))))
+            self._present.extend(bytes((cells + 7) // 8 - len(self._present)))
+        previous = self.split(period, direction, minute)
+        self._values[2 * cell] = stopped
+        self._values[2 * cell + 1] = notstopped
+        if previous is None:
+            self._present[cell >> 3] |= 1 << (cell & 7)
+            self._count += 1
+        return previous
+
+    def clear(self):
+        del self._values[:]
+        self._present = bytearray()
+        self._extra.clear()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        try:
+            return self.split(*key) is not None
+        except (TypeError, ValueError):
+            return False
+
+    def __getitem__(self, key):
+        split = self.split(*key)
+        if split is None:
+            raise KeyError(key)
+        return {"stopped": split[0], "notstopped": split[1]}
+
+    def __iter__(self):
+        per_period = len(DIRECTIONS) * MINUTES_PER_PERIOD
+        for i, byte in enumerate(self._present):
+            while byte:
+                bit = byte & -byte
+                cell = 8 * i + bit.bit_length() - 1
+                byte ^= bit
+                period, rest = divmod(cell, per_period)
+                code, minute = divmod(rest, MINUTES_PER_PERIOD)
+                yield period + 1, DIRECTIONS[code], minute + 1
+        yield from list(self._extra)
+
+    def dense(self):
+        """(values, present): NumPy copies shaped (period, direction, minute, 2) and (period, direction, minute)."""
+        import numpy as np
+
+        shape = (self.num_periods, len(DIRECTIONS), MINUTES_PER_PERIOD)
+        values = np.frombuffer(self._values, dtype=np.int32).reshape(shape + (2,)).astype(np.int64)
+        bits = np.unpackbits(np.frombuffer(bytes(self._present), dtype=np.uint8), bitorder="little")
+        present = bits[:values[..., 0].size].astype(bool).reshape(shape)
+        return values, present
+
+    def extra_items(self):
+        """(key, (stopped, notstopped)) of the splits outside the dense layout."""
+        return self._extra.items()
+
+
+class UniqueAggregates:
+    """Per-minute unique splits with their totals kept current by signed deltas.
+
+    minute_map: {(period, direction, minute): {"stopped": int, "notstopped": int}}
+    unique_map: {(period, direction): {"stopped": int, "notstopped": int}}
+    approach_volume: {(period, direction): int}
+    total_stopped / total_notstopped: totals over the whole session
+
+    Changing one minute costs O(1) no matter how long the session is. With
+    check=True every change is followed by verify(), which compares the
+    running totals against a full rebuild from minute_map. version increases
+    on every change to the splits, like ObservationStore.version.
+    """
+
+    def __init__(self, check=False):
+        self.minute_map = UniqueMinuteArray()
+        self.unique_map = {}
+        self.approach_volume = {}
+        self.total_stopped = 0
+        self.total_notstopped = 0
+        self.check = check
+        self.version = 0
+
+    def get_minute(self, period, direction, minute):
+        return self.minute_map.get((period, direction, minute))
+
+    def set_minute(self, period, direction, minute, stopped, notstopped):
+        """Store the unique split for one minute and apply the change to the totals."""
+        stopped = max(0, int(stopped))
+        notstopped = max(0, int(notstopped))
+        self.version += 1
+        previous = self.minute_map.set(period, direction, minute, stopped, notstopped)
+        if previous is None:
+            delta_stopped, delta_notstopped = stopped, notstopped
+        else:
+            delta_stopped = stopped - previous[0]
+            delta_notstopped = notstopped - previous[1]
+
+        agg = self.unique_map.get((period, direction))
+        if agg is None:
+            agg = self.unique_map[(period, direction)] = {"stopped": 0, "notstopped": 0}
+        agg["stopped"] += delta_stopped
+        agg["notstopped"] += delta_notstopped
+        self.approach_volume[(period, direction)] = agg["stopped"] + agg["notstopped"]
+        self.total_stopped += delta_stopped
+        self.total_notstopped += delta_notstopped
+
+        if self.check:
+            self.verify()
+
+    def load(self, minute_map):
+        """Replace every split with minute_map's and rebuild the totals once."""
+        self.clear()
+        for (period, direction, minute), v in minute_map.items():
+            self.minute_map.set(period, direction, minute,
+                                max(0, int(v.get("stopped", 0))), max(0, int(v.get("notstopped", 0))))
+        unique_map, approach_volume, self.total_stopped, self.total_notstopped = self.rebuild()
+        self.unique_map.update(unique_map)
+        self.approach_volume.update(approach_volume)
+
+    def rebuild(self):
+        """Recompute every total from minute_map: axis sums over the dense array."""
+        import numpy as np
+
+        values, present = self.minute_map.dense()
+        sums = values.sum(axis=2)
+        unique_map = {}
+        for p, d in zip(*np.nonzero(present.any(axis=2))):
+            stopped, notstopped = sums[p, d].tolist()
+            unique_map[(int(p) + 1, DIRECTIONS[d])] = {"stopped": stopped, "notstopped": notstopped}
+        for (p, d, m), (stopped, notstopped) in self.minute_map.extra_items():
+            agg = unique_map.setdefault((p, d), {"stopped": 0, "notstopped": 0})
+            agg["stopped"] += stopped
+            agg["notstopped"] += notstopped
+        approach_volume = {k: v["stopped"] + v["notstopped"] for k, v in unique_map.items()}
+        total_stopped = sum(v["stopped"] for v in unique_map.values())
+        total_notstopped = sum(v["notstopped"] for v in unique_map.values())
+        return unique_map, approach_volume, total_stopped, total_notstopped
+
+    def verify(self):
+        """Raise RuntimeError if the running totals differ from a full rebuild."""
+        # approach_volume is not compared: save_approach_volume may override it by hand
+        unique_map, _, total_stopped, total_notstopped = self.rebuild()
+        mismatched = sorted(
+            key for key in set(unique_map) | set(self.unique_map)
+            if unique_map.get(key) != self.unique_map.get(key)
+        )
+        if mismatched or (total_stopped, total_notstopped) != (self.total_stopped, self.total_notstopped):
+            raise RuntimeError(
+                f"Unique aggregates out of sync for {mismatched or 'session totals'}: "
+                f"incremental totals ({self.total_stopped}, {self.total_notstopped}), "
+                f"rebuilt totals ({total_stopped}, {total_notstopped})"
+            )
+
+    def clear(self):
+        # Clear in place so callers holding the dicts see the reset
+        self.version += 1
+        self.minute_map.clear()
+        self.unique_map.clear()
+        self.approach_volume.clear()
+        self.total_stopped = 0
+        self.total_notstopped = 0
@@ -0,0 +1,485 @@
+"""Multi-observer aggregation over local sockets.
+
+A study usually stations one observer per approach. Each DelayStudyApp
+started with DELAY_SERVER=host:port streams its journal events (entry,
+unique, volume, info; see delay_journal) to an AggregationServer, which
+merges them into one session keyed by (period, direction, minute) and sends
+every client the combined results at most once per RESULTS_INTERVAL.
+
+    python delay_sync.py --host 0.0.0.0 --port 8765 --save merged_DATA.xlsx
+
+The wire format is the journal's: one compact JSON array per line. Each
+connection starts with ["hello", client id]. Merging is last-write-wins per
+key, so a client that reconnects simply resends its event history, kept
+compact with only the latest event per key. A "clear" event (Clear All Data,
+Open Data) drops every row, split and volume that client wrote last.
+SyncClient runs its own asyncio loop on a background thread; send() and
+poll() never block the Tk thread.
+
+    python delay_sync.py --self-test        # server and observers on localhost, port 0
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Combined results are recomputed and broadcast at most this often (seconds)
+RESULTS_INTERVAL = 1.0
+
+# Seconds between reconnection attempts
+RETRY_INTERVAL = 2.0
+
+
+def parse_address(text):
+    """"host:port", "host" or ":port" -> (host, port)."""
+    host, _, port = text.rpartition(":") if ":" in text else (text, "", "")
+    return host or DEFAULT_HOST, int(port) if port else DEFAULT_PORT
+
+
+def server_address():
+    """(host, port) from $DELAY_SERVER, or None when multi-observer mode is off."""
+    value = os.environ.get("DELAY_SERVER", "")
+    return parse_address(value) if value else None
+
+
+def _encode(event):
+    return (json.dumps(event, separators=(",", ":")) + "\n").encode()
+
+
+# Field types of the events MergedSession merges, after the kind; "counts" is a list of four ints
+_EVENT_FIELDS = {
+    "entry": (int, int, str, "counts", int, "counts", int),
+    "unique": (int, str, int, int, int),
+    "volume": (int, str, int),
+}
+
+
+def check_event(event):
+    """Raise ValueError unless event has the fields its kind needs (see _EVENT_FIELDS)."""
+    fields = _EVENT_FIELDS.get(event[0])
+    if fields is None:
+        return
+    if len(event) != len(fields) + 1:
+        raise ValueError(f"{event[0]} event needs {len(fields)} fields, got {len(event) - 1}")
+    for value, kind in zip(event[1:], fields):
+        if kind == "counts":
+            ok = isinstance(value, list) and len(value) == 4 and all(type(v) is int for v in value)
+        else:
+            ok = type(value) is kind
+        if not ok:
+            raise ValueError(f"bad {event[0]} event field {value!r}")
+
+
+def _history_key(event):
+    """The key a later event of the same kind replaces, or None for events not kept."""
+    kind = event[0] if event else None
+    if kind == "entry":
+        return kind, event[1], event[3], event[2]
+    if kind == "unique":
+        return kind, event[1], event[2], event[3]
+    if kind == "volume":
+        return kind, event[1], event[2]
+    if kind in ("info", "clear"):
+        return (kind,)
+    return None
+
+
+class MergedSession:
+    """One study merged from the events of every observer."""
+
+    def __init__(self, num_periods=None):
+        # (period, direction, minute) -> (stopped, unique_stopped, notstopped, unique_notstopped)
+        self.rows = {}
+        self.unique_minute_map = {}
+        self.approach_volume = {}
+        # (table, key) -> client that wrote it last, for "clear"
+        self.owners = {}
+        # Latest "info" fields: date, intersection, weather, hour, minute, second, periods
+        self.info = None
+        self.num_periods = num_periods
+
+    def apply(self, event, client=None):
+        """Merge one journal event from client; returns True if the session changed.
+
+        Raises ValueError for a malformed event, leaving the session unchanged.
+        """
+        kind = event[0] if event else None
+        if kind is not None:
+            check_event(event)
+        if kind == "entry":
+            _, period, minute, direction, stopped, u_st, notstopped, u_ns = event
+            key = (period, direction, minute)
+            self.rows[key] = (stopped, u_st, notstopped, u_ns)
+            self.unique_minute_map[key] = {"stopped": u_st, "notstopped": u_ns}
+            self.owners[("rows", key)] = self.owners[("unique_minute_map", key)] = client
+        elif kind == "unique":
+            _, period, direction, minute, stopped, notstopped = event
+            key = (period, direction, minute)
+            self.unique_minute_map[key] = {"stopped": stopped, "notstopped": notstopped}
+            self.owners[("unique_minute_map", key)] = client
+        elif kind == "volume":
+            _, period, direction, count = event
+            self.approach_volume[(period, direction)] = count
+            self.owners[("approach_volume", (period, direction))] = client
+        elif kind == "info":
+            self.info = list(event[1:])
+        elif kind == "clear":
+            return self.clear(client)
+        else:
+            return False
+        return True
+
+    def clear(self, client):
+        """Drop everything client wrote last; returns True if anything was dropped."""
+        dropped = [owned for owned, owner in self.owners.items() if owner == client]
+        for table, key in dropped:
+            del getattr(self, table)[key]
+            del self.owners[(table, key)]
+        return bool(dropped)
+
+    def periods(self):
+        """Study length: the largest of the configured, announced and recorded period counts."""
+        candidates = [self.num_periods or 0] + [period for period, _, _ in self.rows]
+        if self.info is not None and len(self.info) > 6:
+            try:
+                candidates.append(int(self.info[6]))
+            except ValueError:
+                pass
+        return max(candidates) or None
+
+    def store(self):
+        """ObservationStore of the merged rows, ordered by period, direction and minute."""
+        from delay_store import DIRECTIONS, ObservationStore
+
+        order = {name: i for i, name in enumerate(DIRECTIONS)}
+        store = ObservationStore()
+        for key in sorted(self.rows, key=lambda k: (k[0], order.get(k[1], len(order)), k[1], k[2])):
+            period, direction, minute = key
+            stopped, u_st, notstopped, u_ns = self.rows[key]
+            store.append(period, minute, direction, stopped, u_st, notstopped, u_ns)
+        return store
+
+    def study_info(self):
+        """The info dict delay_io writers take, from the latest "info" event."""
+        date, intersection, weather, hour, minute, second = (self.info or [""] * 6)[:6]
+        return {"date": date, "intersection": intersection, "weather": weather,
+                "start_time": f"{hour}:{minute}:{second}"}
+
+    def summary(self):
+        """Combined overall and per-direction results as plain JSON values."""
+        import delay_engine
+
+        num_periods = self.periods()
+        args = (num_periods,) if num_periods else ()
+        results = delay_engine.calculate(self.store(), self.unique_minute_map, *args)
+        minutes = {}
+        for _, direction, _ in self.rows:
+            minutes[direction] = minutes.get(direction, 0) + 1
+        return {
+            "rows": len(self.rows),
+            "num_periods": results.arrays.num_periods,
+            "minutes": minutes,
+            "overall": results.overall,
+            "by_direction": results.by_direction,
+        }
+
+
+class AggregationServer:
+    """asyncio server merging the events of every connected client."""
+
+    def __init__(self, session=None, host=DEFAULT_HOST, port=DEFAULT_PORT, results_interval=RESULTS_INTERVAL,
+                 on_results=None):
+        self.session = session or MergedSession()
+        self.host = host
+        self.port = port
+        self.results_interval = results_interval
+        # Called with each broadcast summary (the CLI prints it)
+        self.on_results = on_results
+        self.clients = set()
+        self.latest = None
+        self._server = None
+        self._pending = None
+
+    async def start(self):
+        """Start listening; port 0 picks a free port, stored in self.port."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        for writer in list(self.clients):
+            writer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.clients.add(writer)
+        # Until the client says hello, its events belong to this connection
+        client = id(writer)
+        if self.latest is not None:
+            writer.write(self.latest)
+        else:
+            self._changed()
+        try:
+            async for line in reader:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(event, list) or not event:
+                    continue
+                if event[0] == "hello" and len(event) > 1:
+                    client = event[1]
+                    continue
+                try:
+                    changed = self.session.apply(event, client)
+                except (ValueError, TypeError) as e:
+                    # One bad event must not cost the observer its connection
+                    print(f"Skipped event from {client}: {e}", file=sys.stderr)
+                    continue
+                if changed:
+                    self._changed()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+            self._changed()
+
+    def _changed(self):
+        # Coalesce: one recomputation per interval however many events arrive
+        if self._pending is None:
+            loop = asyncio.get_running_loop()
+            self._pending = loop.call_later(self.results_interval, self._broadcast)
+
+    def _broadcast(self):
+        self._pending = None
+        summary = self.session.summary()
+        summary["observers"] = len(self.clients)
+        self.latest = _encode(["results", summary])
+        for writer in self.clients:
+            if not writer.is_closing():
+                writer.write(self.latest)
+        if self.on_results is not None:
+            self.on_results(summary)
+
+
+class SyncClient:
+    """Streams events to an AggregationServer from a background asyncio thread.
+
+    send() queues an event without blocking; poll() returns the newest
+    combined results received since the last poll (or None). The client
+    reconnects on its own and resends its event history each time: the
+    latest event per key since the last "clear", so it stays as large as the
+    session, not the number of keystrokes.
+    """
+
+    def __init__(self, host, port, retry_interval=RETRY_INTERVAL, client_id=None):
+        self.host = host
+        self.port = port
+        self.retry_interval = retry_interval
+        # Identifies this observer across reconnections
+        self.client_id = client_id or uuid.uuid4().hex
+        self.connected = False
+        self._inbox = queue.Queue()
+        # Loop-thread state: history key -> latest event, oldest first, and the current connection
+        self._history = {}
+        self._writer = None
+        self._loop = asyncio.new_event_loop()
+        self._task = None
+        self._thread = threading.Thread(target=self._run, name="delay-sync", daemon=True)
+        self._thread.start()
+
+    def send(self, *event):
+        self._loop.call_soon_threadsafe(self._put, list(event))
+
+    def poll(self):
+        latest = None
+        while True:
+            try:
+                latest = self._inbox.get_nowait()
+            except queue.Empty:
+                return latest
+
+    def close(self, timeout=2.0):
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join(timeout)
+
+    def _put(self, event):
+        key = _history_key(event)
+        if event[0] == "clear":
+            # The server forgets this client's rows; a reconnect must not bring them back
+            self._history.clear()
+        if key is not None:
+            # Move the key to the end so replay keeps the order of the latest events
+            self._history.pop(key, None)
+            self._history[key] = event
+        if self._writer is not None and not self._writer.is_closing():
+            self._writer.write(_encode(event))
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._task = self._loop.create_task(self._connect_forever())
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _connect_forever(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError:
+                await asyncio.sleep(self.retry_interval)
+                continue
+            self._writer = writer
+            self.connected = True
+            try:
+                writer.write(_encode(["hello", self.client_id])
+                             + b"".join(_encode(event) for event in self._history.values()))
+                async for line in reader:
+                    try:
+                        message = json.loads(line)
+                    except ValueError:
+                        continue
+                    if message and message[0] == "results":
+                        self._inbox.put(message[1])
+            except ConnectionError:
+                pass
+            finally:
+                self.connected = False
+                self._writer = None
+                writer.close()
+            await asyncio.sleep(self.retry_interval)
+
+
+def results_text(summary):
+    """One-line combined status, e.g. for the app's status label."""
+    overall = summary["overall"]
+    return (f"Combined ({summary.get('observers', 0)} observers, {summary['rows']} minutes): "
+            f"{overall['Total Vehicles']} veh, {overall['Avg Delay per Approach (sec)']:.1f} s/veh, "
+            f"{overall['Percent Stopped']:.1f}% stopped")
+
+
+def self_test(observers=3, timeout=10.0):
+    """Exercise server and clients over localhost (port 0); raises AssertionError on failure.
+
+    Each observer counts one direction of one period. The merged results
+    must match delay_engine on the same rows; a "clear" must drop that
+    observer's rows only; after a server restart the clients must rebuild
+    the same session from their compact histories.
+    """
+    import delay_engine
+    from delay_store import DIRECTIONS
+
+    directions = DIRECTIONS[:observers]
+
+    async def until(condition, what):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise AssertionError(f"timed out waiting for {what}")
+            await asyncio.sleep(0.02)
+
+    async def run():
+        server = AggregationServer(MergedSession(1), "127.0.0.1", 0, results_interval=0.05)
+        await server.start()
+        port = server.port
+        clients = [SyncClient("127.0.0.1", port, retry_interval=0.05) for _ in directions]
+        try:
+            for client, direction in zip(clients, directions):
+                client.send("info", "2025-10-27", "self-test", "Clear", "07", "30", "00", "1")
+                for minute in range(1, 16):
+                    stopped = [minute % 3, 1, 0, minute % 2]
+                    client.send("entry", 1, minute, direction, stopped, minute % 4, [2, 1, 0, 1], 3)
+            await until(lambda: len(server.session.rows) == 15 * observers, "every observer's minutes")
+            session = server.session
+            expected = delay_engine.calculate(session.store(), session.unique_minute_map, 1)
+            await until(lambda: server.latest is not None and json.loads(server.latest)[1]["rows"] == len(session.rows),
+                        "combined results")
+            assert json.loads(server.latest)[1]["overall"] == json.loads(json.dumps(expected.overall)), \
+                "combined results differ from delay_engine"
+
+            # Keystrokes in the study fields replace one history entry
+            for i in range(200):
+                clients[-1].send("info", "2025-10-27", f"self-test {i}", "Clear", "07", "30", "00", "1")
+            await until(lambda: session.info[1] == "self-test 199", "the latest study info")
+            assert len(clients[-1]._history) == 16, f"history grew to {len(clients[-1]._history)} events"
+
+            clients[0].send("clear")
+            await until(lambda: len(session.rows) == 15 * (observers - 1), "the cleared rows to go")
+            assert all(direction != directions[0] for _, direction, _ in session.rows), "cleared rows remain"
+            kept = dict(session.rows)
+
+            # Restart: the clients reconnect and resend what they still hold
+            await server.stop()
+            server = AggregationServer(MergedSession(1), "127.0.0.1", port, results_interval=0.05)
+            await server.start()
+            await until(lambda: server.session.rows == kept, "the session to be rebuilt after a restart")
+        finally:
+            for client in clients:
+                client.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge the counts of several observers into one study.")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help=f"interface to listen on (default {DEFAULT_HOST}; 0.0.0.0 for the LAN)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default {DEFAULT_PORT})")
+    parser.add_argument("--periods", type=int, help="study length in 15-minute periods")
+    parser.add_argument("--save", metavar="XLSX", help="write the merged raw data here on exit")
+    parser.add_argument("--self-test", action="store_true",
+                        help="run a server and observers on localhost, check the merging and exit")
+    args = parser.parse_args(argv)
+
+    if args.self_test:
+        self_test()
+        print("Self-test passed")
+        return 0
+
+    session = MergedSession(args.periods)
+    server = AggregationServer(session, args.host, args.port,
+                               on_results=lambda s: print(time.strftime("%H:%M:%S"), results_text(s)))
+
+    async def run():
+        await server.start()
+        print(f"Listening on {args.host}:{server.port}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    if args.save and session.rows:
+        import delay_io
+
+        delay_io.write_raw_workbook(args.save, session.store(), session.unique_minute_map, session.study_info())
+        print(f"Saved {len(session.rows)} minute rows to {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
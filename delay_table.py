@@ -0,0 +1,161 @@
+"""Virtualized Collected Data table.
+
+Only the rows that fit in the window exist as Treeview items. Scrolling
+rewrites the values of that fixed pool of items from the ObservationStore
+instead of creating one item per row, so scrolling and adding rows cost the
+same with 60 rows or 20,000.
+"""
+import tkinter as tk
+from array import array
+from tkinter import ttk
+
+DEFAULT_ROW_HEIGHT = 20
+
+
+class VirtualTable:
+    """Treeview window onto an ObservationStore with optional row filtering."""
+
+    def __init__(self, parent, store, headers, width=80):
+        self.store = store
+        # Row indices of the filtered view; None shows every row
+        self._index = None
+        self._filter = (None, None)
+        self.offset = 0
+        self.visible = 1
+        self._items = []
+        self._attached = 0
+
+        self.scrollbar = ttk.Scrollbar(parent, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.tree = ttk.Treeview(parent, columns=tuple(headers), show="headings")
+        for col, heading in headers.items():
+            self.tree.heading(col, text=heading)
+            self.tree.column(col, width=width)
+        self.tree.pack(fill="both", expand=True, side="left")
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+
+    def __len__(self):
+        return len(self.store) if self._index is None else len(self._index)
+
+    def _store_row(self, i):
+        return i if self._index is None else self._index[i]
+
+    def _row_height(self):
+        try:
+            return int(ttk.Style().lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT)
+        except (tk.TclError, ValueError):
+            return DEFAULT_ROW_HEIGHT
+
+    def _on_configure(self, event):
+        row_height = self._row_height()
+        top = row_height  # heading
+        if self._attached:
+            bbox = self.tree.bbox(self._items[0])
+            if bbox:
+                top, row_height = bbox[1], bbox[3]
+        visible = max(1, (event.height - top) // max(row_height, 1))
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def _on_wheel(self, event):
+        if event.delta:
+            self.yview("scroll", -1 if event.delta > 0 else 1, "units")
+        return "break"
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"|"pages")."""
+        if not args:
+            return
+        max_offset = max(0, len(self) - self.visible)
+        if args[0] == "moveto":
+            offset = int(round(float(args[1]) * len(self)))
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            offset = self.offset + int(args[1]) * step
+        else:
+            return
+        offset = min(max(0, offset), max_offset)
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def render(self):
+        """Write the visible window of rows into the recycled item pool."""
+        total = len(self)
+        self.offset = min(self.offset, max(0, total - self.visible))
+        count = min(self.visible, total - self.offset)
+        # Grow the pool on demand; items are never deleted, only detached
+        while len(self._items) < count:
+            item = self.tree.insert("", "end")
+            self.tree.detach(item)
+            self._items.append(item)
+        for i in range(count):
+            item = self._items[i]
+            if i >= self._attached:
+                self.tree.move(item, "", i)
+            self.tree.item(item, values=self.store.row(self._store_row(self.offset + i)))
+        if count < self._attached:
+            self.tree.detach(*self._items[count:self._attached])
+        self._attached = count
+
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + count) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def refresh(self, follow=True):
+        """Show rows appended to the store; follow=True scrolls to the newest row."""
+        if self._index is not None:
+            start = self._indexed
+            for i in range(start, len(self.store)):
+                if self._matches(i):
+                    self._index.append(i)
+            self._indexed = len(self.store)
+        if follow:
+            self.offset = max(0, len(self) - self.visible)
+        self.render()
+
+    def _matches(self, i):
+        period, direction = self._filter
+        row = self.store.row(i)
+        return (period is None or row[0] == period) and (direction is None or row[2] == direction)
+
+    def set_filter(self, period=None, direction=None):
+        """Show only rows of one period and/or direction (None means any).
+
+        The view is an index array over the store; no rows are copied.
+        """
+        self._filter = (period, direction)
+        if period is None and direction is None:
+            self._index = None
+        else:
+            if period is not None:
+                # The store's period index avoids scanning every row
+                rows = self.store.period_rows(period)
+            else:
+                rows = None
+            if direction is not None:
+                codes = self.store.column("direction") == self.store.direction_code(direction)
+                rows = codes.nonzero()[0] if rows is None else rows[codes[rows]]
+            self._index = array("l", rows.tolist())
+            self._indexed = len(self.store)
+        self.offset = 0
+        self.render()
+
+    def clear(self):
+        """Drop every item in one call; the store is cleared by its owner."""
+        if self._items:
+            self.tree.delete(*self._items)
+        self._items = []
+        self._attached = 0
+        self.offset = 0
+        if self._index is not None:
+            self._index = array("l")
+            self._indexed = 0
+        self.render()
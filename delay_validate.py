@@ -0,0 +1,186 @@
+"""Whole-session consistency checks (no Tk).
+
+validate() runs every check as array operations over the dense session
+arrays of delay_engine and returns a ValidationReport whose issues point
+back at rows of the ObservationStore (the Collected Data table order):
+
+    unknown_direction   a row whose direction is not one of DIRECTIONS (the results leave it out)
+    out_of_range        a row whose period is below 1 or whose minute is outside 1-15
+    missing_minute      a minute with no row in a (period, direction) that has rows
+    duplicate_minute    more than one row for the same (period, direction, minute)
+    unique_exceeds_raw  unique stopped above the sum of the four stopped snapshots
+    outlier             a minute whose snapshot total is more than z_threshold
+                        standard deviations from its neighbouring minutes of the
+                        same direction (rolling window, the minute itself excluded)
+"""
+import numpy as np
+
+import delay_engine
+from delay_store import DIRECTIONS, MINUTES_PER_PERIOD
+
+ERROR_KINDS = ("unknown_direction", "out_of_range", "missing_minute", "duplicate_minute", "unique_exceeds_raw")
+WARNING_KINDS = ("outlier",)
+
+# Rolling z-score: neighbours on each side, threshold and the fewest neighbours to judge by
+OUTLIER_HALF_WINDOW = 10
+OUTLIER_Z = 4.0
+OUTLIER_MIN_NEIGHBOURS = 8
+# Standard deviations below one vehicle are raised to one, so near-constant counts do not flag jitter
+OUTLIER_MIN_STD = 1.0
+
+REPORT_COLUMNS = ["Severity", "Check", "Interval", "Direction", "Minute", "Rows", "Detail"]
+
+
+class Issue:
+    """One finding at (period, direction, minute); rows are ObservationStore indices."""
+
+    __slots__ = ("kind", "period", "direction", "minute", "rows", "detail")
+
+    def __init__(self, kind, period, direction, minute, rows, detail):
+        self.kind = kind
+        self.period = period
+        self.direction = direction
+        self.minute = minute
+        self.rows = rows
+        self.detail = detail
+
+    @property
+    def severity(self):
+        return "error" if self.kind in ERROR_KINDS else "warning"
+
+    def row(self):
+        """REPORT_COLUMNS values; row numbers are 1-based as in the table."""
+        return [self.severity, self.kind, self.period, self.direction, self.minute,
+                " ".join(str(r + 1) for r in self.rows), self.detail]
+
+
+class ValidationReport:
+    """Issues of one session, ordered by period, direction and minute."""
+
+    def __init__(self, issues, rows_checked):
+        order = {name: i for i, name in enumerate(DIRECTIONS)}
+        self.issues = sorted(issues, key=lambda i: (i.period, order.get(i.direction, len(order)), i.minute))
+        self.rows_checked = rows_checked
+
+    @property
+    def ok(self):
+        return not self.issues
+
+    @property
+    def errors(self):
+        return [issue for issue in self.issues if issue.severity == "error"]
+
+    def counts(self):
+        """{kind: number of issues} for every check, including those with none."""
+        counts = dict.fromkeys(ERROR_KINDS + WARNING_KINDS, 0)
+        for issue in self.issues:
+            counts[issue.kind] += 1
+        return counts
+
+    def rows(self):
+        return [issue.row() for issue in self.issues]
+
+    def summary(self):
+        """One line, e.g. "240 rows: 2 missing_minute, 1 outlier"."""
+        found = ", ".join(f"{n} {kind}" for kind, n in self.counts().items() if n)
+        return f"{self.rows_checked} rows: {found or 'no issues'}"
+
+    def text(self, limit=40):
+        """Summary plus the first limit issues, for a message box."""
+        lines = [self.summary()]
+        for issue in self.issues[:limit]:
+            rows = f" (row {', '.join(str(r + 1) for r in issue.rows)})" if issue.rows else ""
+            lines.append(f"{issue.severity.upper()}: period {issue.period} {issue.direction} "
+                         f"minute {issue.minute}{rows}: {issue.detail}")
+        if len(self.issues) > limit:
+            lines.append(f"... and {len(self.issues) - limit} more")
+        return "\n".join(lines)
+
+
+def validate(store, unique_minute_map, z_threshold=OUTLIER_Z, half_window=OUTLIER_HALF_WINDOW):
+    """Run every check over the session; returns a ValidationReport."""
+    arrays = delay_engine.build_session_arrays(store, unique_minute_map, 1)
+    shape = arrays.minute_rows.shape
+    periods = store.column("period").astype(np.intp)
+    minutes = store.column("minute").astype(np.intp)
+    codes = store.column("direction").astype(np.intp)
+    # Flat (period, direction, minute) cell of every row of the four compass directions, else -1
+    inside = (codes < len(DIRECTIONS)) & (periods >= 1) & (minutes >= 1) & (minutes <= shape[2])
+    cell = np.full(len(store), -1, dtype=np.intp)
+    cell[inside] = np.ravel_multi_index((periods[inside] - 1, codes[inside], minutes[inside] - 1), shape)
+
+    # Store rows of cell c are rows_of[starts[c]:starts[c] + counts[c]], in table order
+    counts = np.bincount(cell[inside], minlength=int(np.prod(shape)))
+    starts = np.zeros(counts.size, dtype=np.intp)
+    starts[1:] = np.cumsum(counts)[:-1]
+    rows_of = np.argsort(cell, kind="stable")[np.count_nonzero(~inside):]
+
+    def finding(kind, c, detail):
+        p, d, m = np.unravel_index(c, shape)
+        rows = tuple(rows_of[starts[c]:starts[c] + counts[c]].tolist())
+        return Issue(kind, int(p) + 1, DIRECTIONS[d], int(m) + 1, rows, detail)
+
+    counts_3d = counts.reshape(shape)
+    issues = []
+
+    # Rows the dense layout cannot place, one issue each
+    unknown = codes >= len(DIRECTIONS)
+    out_of_range = ~unknown & ((periods < 1) | (minutes < 1) | (minutes > MINUTES_PER_PERIOD))
+    for i in np.flatnonzero(unknown | out_of_range).tolist():
+        direction = store.directions[codes[i]]
+        if unknown[i]:
+            kind, detail = "unknown_direction", f"direction {direction!r} is not one of {', '.join(DIRECTIONS)}"
+        else:
+            kind, detail = "out_of_range", f"period {periods[i]} minute {minutes[i]} is outside the study layout"
+        issues.append(Issue(kind, int(periods[i]), direction, int(minutes[i]), (i,), detail))
+
+    # Missing: regular minutes without a row in the (period, direction) groups that have rows
+    has_rows = counts_3d.sum(axis=2) > 0
+    missing = np.zeros(shape, dtype=bool)
+    missing[:, :, :MINUTES_PER_PERIOD] = (counts_3d[:, :, :MINUTES_PER_PERIOD] == 0) & has_rows[:, :, None]
+    for c in np.flatnonzero(missing).tolist():
+        issues.append(finding("missing_minute", c, "no entry recorded"))
+
+    for c in np.flatnonzero(counts > 1).tolist():
+        issues.append(finding("duplicate_minute", c, f"{counts[c]} entries for one minute"))
+
+    # The unique stopped the results use (the minute's split) against the stopped snapshots recorded
+    raw = arrays.stopped.sum(axis=3).reshape(-1)
+    unique = arrays.unique[..., 0].reshape(-1)
+    for c in np.flatnonzero((counts > 0) & (unique > raw)).tolist():
+        issues.append(finding("unique_exceeds_raw", c,
+                              f"unique stopped {unique[c]} > {raw[c]} stopped in snapshots"))
+
+    for c, detail in _outliers(arrays, counts_3d, z_threshold, half_window):
+        issues.append(finding("outlier", c, detail))
+    return ValidationReport(issues, len(store))
+
+
+def _outliers(arrays, counts, z_threshold, half_window):
+    """(flat cell, detail) of rolling z-score outliers of the per-minute snapshot totals."""
+    num_periods, num_directions, num_minutes = counts.shape
+    # (direction, study minute) series; duplicates were summed, so only single-row minutes are judged
+    totals = (arrays.stopped.sum(axis=3) + arrays.notstopped.sum(axis=3)).astype(np.float64)
+    recorded = (counts == 1).transpose(1, 0, 2).reshape(num_directions, -1)
+    values = np.where(recorded, totals.transpose(1, 0, 2).reshape(num_directions, -1), 0.0)
+
+    # Window sums from prefix sums, minus the minute itself
+    width = 2 * half_window + 1
+    padded = np.pad(np.stack([recorded.astype(np.float64), values, values ** 2]),
+                    ((0, 0), (0, 0), (half_window + 1, half_window)))
+    prefix = np.cumsum(padded, axis=2)
+    window = prefix[:, :, width:] - prefix[:, :, :-width]
+    count = window[0] - recorded
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = (window[1] - values) / count
+        std = np.sqrt(np.maximum((window[2] - values ** 2) / count - mean ** 2, 0.0))
+        z = (values - mean) / np.maximum(std, OUTLIER_MIN_STD)
+    flagged = recorded & (count >= OUTLIER_MIN_NEIGHBOURS) & (np.abs(z) > z_threshold)
+
+    found = []
+    for d, t in zip(*np.nonzero(flagged)):
+        p, m = divmod(int(t), num_minutes)
+        found.append((int(np.ravel_multi_index((p, d, m), counts.shape)),
+                      f"{int(values[d, t])} vehicles in snapshots vs {mean[d, t]:.1f} "
+                      f"+/- {std[d, t]:.1f} nearby (z = {z[d, t]:.1f})"))
+    return found